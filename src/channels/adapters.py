@@ -5,54 +5,54 @@ WebChat, Discord, and Telegram interfaces
 """
 
 import asyncio
+import hmac
+import itertools
 import json
-from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List, Optional, Dict
+import secrets
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Dict, Protocol, Tuple
 from datetime import datetime
 from enum import Enum
 
+# Bound on per-adapter inbound queues; oldest messages drop first when full
+MAX_QUEUE_SIZE = 10_000
+
 class Channel(Enum):
     WEBCHAT = "webchat"
     DISCORD = "discord"
     TELEGRAM = "telegram"
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     id: str
     channel: Channel
     content: str
     sender: str
     timestamp: datetime
-    metadata: Dict = None
-    
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+    metadata: Dict = field(default_factory=dict)
 
-class ChannelAdapter(ABC):
-    """Base class for channel adapters"""
+class ChannelAdapter(Protocol):
+    """Shape every channel adapter implements (structural, not inherited)"""
     
-    @abstractmethod
     async def send(self, message: str, target: str = None) -> bool:
         """Send a message to the channel"""
-        pass
+        ...
     
-    @abstractmethod
     async def receive(self) -> List[Message]:
         """Receive messages from the channel"""
-        pass
+        ...
     
-    @abstractmethod
     async def start_listening(self):
         """Start listening for incoming messages"""
-        pass
+        ...
 
-class WebChatAdapter(ChannelAdapter):
+class WebChatAdapter:
     """WebChat adapter - current primary channel"""
     
     def __init__(self):
-        self.message_queue: List[Message] = []
+        self.message_queue: Deque[Message] = deque(maxlen=MAX_QUEUE_SIZE)
         self.listeners: List[callable] = []
         
     async def send(self, message: str, target: str = None) -> bool:
@@ -64,7 +64,7 @@ class WebChatAdapter(ChannelAdapter):
     
     async def receive(self) -> List[Message]:
         """Receive from local queue"""
-        msgs = self.message_queue.copy()
+        msgs = list(self.message_queue)
         self.message_queue.clear()
         return msgs
     
@@ -76,13 +76,13 @@ class WebChatAdapter(ChannelAdapter):
         """Add message to queue for processing"""
         self.message_queue.append(message)
 
-class DiscordAdapter(ChannelAdapter):
+class DiscordAdapter:
     """Discord bot adapter"""
     
     def __init__(self, token: str, guild_id: str = None):
         self.token = token
         self.guild_id = guild_id
-        self.message_queue: List[Message] = []
+        self.message_queue: Deque[Message] = deque(maxlen=MAX_QUEUE_SIZE)
         self.running = False
         
     async def send(self, message: str, channel_id: str = None) -> bool:
@@ -95,31 +95,67 @@ class DiscordAdapter(ChannelAdapter):
     async def receive(self) -> List[Message]:
         """Receive pending messages"""
         # Would poll Discord API
-        return self.message_queue.copy()
+        return list(self.message_queue)
     
     async def start_listening(self):
         """Start Discord bot"""
         self.running = True
         print("[Discord] Bot started (placeholder)")
 
-class TelegramAdapter(ChannelAdapter):
+class TelegramAdapter:
     """Telegram bot adapter"""
     
-    def __init__(self, bot_token: str):
+    WEBHOOK_PATH = "/tg/webhook"
+    SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+    
+    def __init__(self, bot_token: str, public_url: str = None,
+                 webhook_host: str = "127.0.0.1", webhook_port: int = 8443,
+                 webhook_secret: str = None):
         self.token = bot_token
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
-        self.message_queue: List[Message] = []
+        self.message_queue: Deque[Message] = deque(maxlen=MAX_QUEUE_SIZE)
+        self.poll_timeout = 25  # seconds Telegram may hold getUpdates open
+        self._next_offset = 0
+        self._client = None
+        # Webhook mode is used only when Telegram can reach us at public_url
+        self.public_url = public_url
+        self.webhook_host = webhook_host
+        self.webhook_port = webhook_port
+        # Telegram echoes this in SECRET_HEADER; updates without it are rejected.
+        # The server binds locally; a TLS proxy exposes it at public_url.
+        self.webhook_secret = webhook_secret or secrets.token_urlsafe(32)
+        self._runner = None
+        # Telegram allows ~30 msg/s per bot; cap in-flight sends to match
+        self._send_slots = asyncio.Semaphore(30)
+        
+    async def __aenter__(self):
+        self._get_client()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+        
+    def _get_client(self):
+        """Lazily create the pooled HTTP/2 client shared by all calls"""
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=8),
+                # Read timeout must outlast the server-side long-poll
+                timeout=httpx.Timeout(10.0, read=self.poll_timeout + 10)
+            )
+        return self._client
         
     async def send(self, message: str, chat_id: str = None) -> bool:
         """Send message to Telegram"""
-        import requests
-        
         if not chat_id:
             print("[Telegram] No chat_id specified")
             return False
             
         try:
-            r = requests.post(
+            client = self._get_client()
+            r = await client.post(
                 f"{self.base_url}/sendMessage",
                 json={"chat_id": chat_id, "text": message}
             )
@@ -128,34 +164,125 @@ class TelegramAdapter(ChannelAdapter):
             print(f"[Telegram] Send failed: {e}")
             return False
     
+    async def send_many(self, messages: List[Tuple[str, str]]) -> List[bool]:
+        """Send (message, chat_id) pairs concurrently over the shared client"""
+        async def _send(message: str, chat_id: str) -> bool:
+            async with self._send_slots:
+                return await self.send(message, chat_id)
+        
+        return list(await asyncio.gather(
+            *(_send(message, chat_id) for message, chat_id in messages)
+        ))
+    
+    def _parse_update(self, update: Dict) -> Message:
+        """Convert a Telegram update payload into a Message"""
+        msg = update.get("message", {})
+        return Message(
+            id=str(update.get("update_id")),
+            channel=Channel.TELEGRAM,
+            content=msg.get("text", ""),
+            sender=str(msg.get("from", {}).get("id", "unknown")),
+            timestamp=datetime.fromtimestamp(msg.get("date", 0))
+        )
+    
     async def receive(self) -> List[Message]:
-        """Get updates from Telegram"""
-        import requests
+        """Drain webhook updates, or long-poll Telegram acknowledging via offset"""
+        if self._runner is not None:
+            msgs = list(self.message_queue)
+            self.message_queue.clear()
+            return msgs
         
         try:
-            r = requests.get(f"{self.base_url}/getUpdates")
+            client = self._get_client()
+            r = await client.get(
+                f"{self.base_url}/getUpdates",
+                params={
+                    "offset": self._next_offset,
+                    "timeout": self.poll_timeout,
+                    "allowed_updates": json.dumps(["message"])
+                }
+            )
             data = r.json()
             
             if data.get("ok"):
                 updates = data.get("result", [])
-                messages = []
-                for update in updates:
-                    msg = update.get("message", {})
-                    messages.append(Message(
-                        id=str(update.get("update_id")),
-                        channel=Channel.TELEGRAM,
-                        content=msg.get("text", ""),
-                        sender=str(msg.get("from", {}).get("id", "unknown")),
-                        timestamp=datetime.fromtimestamp(msg.get("date", 0))
-                    ))
-                return messages
+                if updates:
+                    self._next_offset = max(u["update_id"] for u in updates) + 1
+                return [self._parse_update(update) for update in updates]
         except Exception as e:
             print(f"[Telegram] Receive failed: {e}")
         return []
     
     async def start_listening(self):
-        """Set webhook for Telegram"""
-        print("[Telegram] Webhook mode (placeholder)")
+        """Serve a webhook endpoint and register it with Telegram"""
+        if not self.public_url:
+            print("[Telegram] No public URL configured - using long-polling")
+            return
+        if self._runner is not None:
+            return
+        
+        from aiohttp import web
+        
+        app = web.Application()
+        app.router.add_post(self.WEBHOOK_PATH, self._on_update)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, self.webhook_host, self.webhook_port).start()
+        
+        try:
+            r = await self._get_client().post(
+                f"{self.base_url}/setWebhook",
+                json={
+                    "url": self.public_url.rstrip("/") + self.WEBHOOK_PATH,
+                    "allowed_updates": ["message"],
+                    "secret_token": self.webhook_secret
+                }
+            )
+            registered = bool(r.json().get("ok"))
+            if not registered:
+                print(f"[Telegram] setWebhook refused: {r.text[:200]}")
+        except Exception as e:
+            print(f"[Telegram] setWebhook failed: {e}")
+            registered = False
+        
+        if not registered:
+            await runner.cleanup()
+            print("[Telegram] Webhook not registered - using long-polling")
+            return
+        
+        self._runner = runner
+        print(f"[Telegram] Webhook listening on :{self.webhook_port}{self.WEBHOOK_PATH}")
+    
+    async def _on_update(self, request):
+        """Handle an update POSTed by Telegram"""
+        from aiohttp import web
+        
+        secret = request.headers.get(self.SECRET_HEADER, "")
+        if not hmac.compare_digest(secret.encode(), self.webhook_secret.encode()):
+            return web.Response(status=401)
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        self.message_queue.append(self._parse_update(update))
+        return web.Response(status=200)
+    
+    async def close(self):
+        """Unregister the webhook, stop its server and close the HTTP client"""
+        if self._runner is not None:
+            # While a webhook is registered Telegram refuses getUpdates (409),
+            # which would leave a later long-polling run receiving nothing
+            try:
+                r = await self._get_client().post(f"{self.base_url}/deleteWebhook")
+                if not r.json().get("ok"):
+                    print(f"[Telegram] deleteWebhook refused: {r.text[:200]}")
+            except Exception as e:
+                print(f"[Telegram] deleteWebhook failed: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 class ChannelRouter:
     """Route messages between channels"""
@@ -169,17 +296,25 @@ class ChannelRouter:
         self.channels[channel] = adapter
         
     async def send_all(self, message: str):
-        """Send to all configured channels"""
-        for channel, adapter in self.channels.items():
-            if channel != self.primary_channel:
-                await adapter.send(message)
+        """Send to all configured channels concurrently"""
+        await asyncio.gather(*(
+            adapter.send(message)
+            for channel, adapter in self.channels.items()
+            if channel != self.primary_channel
+        ))
                 
     async def receive_all(self) -> List[Message]:
-        """Receive from all channels"""
+        """Receive from all channels concurrently"""
+        results = await asyncio.gather(
+            *(adapter.receive() for adapter in self.channels.values()),
+            return_exceptions=True
+        )
         all_messages = []
-        for adapter in self.channels.values():
-            msgs = await adapter.receive()
-            all_messages.extend(msgs)
+        for channel, result in zip(self.channels, results):
+            if isinstance(result, BaseException):
+                print(f"[Router] Receive from {channel} failed: {result}")
+                continue
+            all_messages.extend(result)
         return all_messages
 
 class NotificationManager:
@@ -187,36 +322,101 @@ class NotificationManager:
     
     def __init__(self, router: ChannelRouter):
         self.router = router
-        self.pending: List[Message] = []
-        self.batch_size = 3
+        self._queues: Dict[str, Deque[Message]] = {
+            "high": deque(), "normal": deque(), "low": deque()
+        }
+        # Per-priority batch sizes trade latency for throughput
+        self.batch_sizes = {"high": 1, "normal": 3, "low": 10}
         self.batch_timeout = 5.0  # seconds
+        # True: one combined digest per flush; False: one message per notification
+        self.combine_batches = True
+        self._lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        self._timer_task: Optional[asyncio.Task] = None
+        self._seq = itertools.count()
         
     async def notify(self, message: str, priority: str = "normal"):
-        """Queue a notification"""
-        self.pending.append(Message(
-            id=f"notif_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}",
+        """Queue a notification; high priority bypasses batching"""
+        if priority not in self._queues:
+            priority = "normal"
+        notification = Message(
+            id=f"notif_{next(self._seq)}",
             channel=self.router.primary_channel,
             content=message,
             sender="system",
             timestamp=datetime.now(),
             metadata={"priority": priority}
-        ))
+        )
         
-        # Flush if batch full or timeout
-        if len(self.pending) >= self.batch_size:
+        async with self._lock:
+            queue = self._queues[priority]
+            queue.append(notification)
+            should_flush = len(queue) >= self.batch_sizes[priority]
+        
+        # Flush if batch full; the timer loop covers the timeout
+        if should_flush:
+            await self.flush(priority=priority)
+    
+    async def start_timer(self) -> asyncio.Task:
+        """Start the background loop that flushes every batch_timeout"""
+        if self._timer_task is None or self._timer_task.done():
+            self._timer_task = asyncio.create_task(self._timer_loop())
+        return self._timer_task
+    
+    async def stop_timer(self):
+        """Cancel the background flush loop"""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+    
+    async def _timer_loop(self):
+        """Flush whenever batch_timeout has passed since the last flush"""
+        while True:
+            elapsed = time.monotonic() - self._last_flush
+            if elapsed < self.batch_timeout:
+                await asyncio.sleep(self.batch_timeout - elapsed)
+                continue
             await self.flush()
             
-    async def flush(self):
-        """Send all pending notifications"""
-        if not self.pending:
-            return
+    @property
+    def pending(self) -> List[Message]:
+        """All queued notifications, highest priority first"""
+        return [msg for queue in self._queues.values() for msg in queue]
             
-        message = f"📬 Notifications ({len(self.pending)}):\n"
-        for msg in self.pending:
-            message += f"- {msg.content}\n"
+    async def flush(self, priority: str = None):
+        """Send pending notifications for one priority, or normal+low if omitted"""
+        priorities = [priority] if priority else ["normal", "low"]
+        
+        # Swap the queues under the lock so producers never wait on network I/O
+        async with self._lock:
+            if priority is None:
+                self._last_flush = time.monotonic()
+            pending = []
+            for p in priorities:
+                pending.extend(self._queues[p])
+                self._queues[p] = deque()
+            if not pending:
+                return
+            
+        # Collapse repeated content (e.g. cron retries) into one counted line
+        counts = Counter(msg.content for msg in pending)
+        lines = [
+            f"(x{count}) {content}" if count > 1 else content
+            for content, count in counts.most_common()
+        ]
+        
+        if not self.combine_batches:
+            await asyncio.gather(*(self.router.send_all(line) for line in lines))
+            return
+        
+        body = "\n".join(f"- {line}" for line in lines)
+        message = f"📬 Notifications ({len(pending)}):\n{body}\n"
             
         await self.router.send_all(message)
-        self.pending.clear()
 
 if __name__ == "__main__":
     # Test adapters
@@ -11,15 +11,24 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict
 from enum import Enum
 from datetime import datetime
+import itertools
 import json
 
+try:
+    import orjson
+except ImportError:  # optional C-accelerated JSON
+    orjson = None
+
 class AgentRole(Enum):
     STRATEGIST = "strategist"
     SKEPTIC = "skeptic"
     GUARDIAN = "guardian"
     MODERATOR = "moderator"
 
-@dataclass
+# Approval weight per member rating; conditional counts as half approval
+RATING_WEIGHTS = {"support": 1, "approved": 1, "conditional": 0.5, "reject": 0}
+
+@dataclass(slots=True)
 class Proposal:
     id: str
     title: str
@@ -34,24 +43,23 @@ class Proposal:
     votes: Dict[str, str] = field(default_factory=dict)  # role: vote
 
 class CouncilMember:
+    __slots__ = ("role", "role_value", "system_prompt")
+    
     def __init__(self, role: AgentRole):
         self.role = role
+        self.role_value = role.value
         self.system_prompt = ""
         
-    def evaluate(self, proposal: Proposal) -> Dict:
+    def evaluate(self, proposal: Proposal, prior_results: Optional[Dict] = None) -> Dict:
         """Each member evaluates the proposal based on their role"""
-        if self.role == AgentRole.STRATEGIST:
-            return self._evaluate_strategist(proposal)
-        elif self.role == AgentRole.SKEPTIC:
-            return self._evaluate_skeptic(proposal)
-        elif self.role == AgentRole.GUARDIAN:
-            return self._evaluate_guardian(proposal)
-        elif self.role == AgentRole.MODERATOR:
-            return self._evaluate_moderator(proposal)
+        evaluator = self._DISPATCH[self.role]
+        if prior_results is None:
+            return evaluator(self, proposal)
+        return evaluator(self, proposal, prior_results)
             
     def _evaluate_strategist(self, proposal: Proposal) -> Dict:
         return {
-            "role": self.role.value,
+            "role": self.role_value,
             "position": "This proposal aligns with long-term goals",
             "rating": "support",
             "reasoning": f"Strategic fit for {proposal.domain} domain"
@@ -67,7 +75,7 @@ class CouncilMember:
             concerns.append("Very high priority needs justification")
             
         return {
-            "role": self.role.value,
+            "role": self.role_value,
             "position": "Questions and concerns raised",
             "rating": "reject" if proposal.risk_level == "critical" else ("conditional" if concerns else "support"),
             "reasoning": f"Found {len(concerns)} concern(s)" if concerns else "No major issues",
@@ -77,58 +85,72 @@ class CouncilMember:
     def _evaluate_guardian(self, proposal: Proposal) -> Dict:
         if proposal.risk_level == "critical":
             return {
-                "role": self.role.value,
+                "role": self.role_value,
                 "position": "Safety and cost assessment",
                 "rating": "reject",
                 "reasoning": f"Risk: CRITICAL - cannot approve"
             }
         elif proposal.risk_level == "high" and proposal.estimated_cost > 100:
             return {
-                "role": self.role.value,
+                "role": self.role_value,
                 "position": "Safety and cost assessment",
                 "rating": "conditional",
                 "reasoning": f"High risk (${proposal.estimated_cost}) needs approval"
             }
         else:
             return {
-                "role": self.role.value,
+                "role": self.role_value,
                 "position": "Safety and cost assessment",
                 "rating": "approved",
                 "reasoning": f"Risk: {proposal.risk_level}, Cost: ${proposal.estimated_cost}"
             }
     
-    def _evaluate_moderator(self, proposal: Proposal) -> Dict:
-        # Count votes from evaluations
-        ratings = {
-            AgentRole.STRATEGIST: "support",
-            AgentRole.SKEPTIC: "conditional",
-            AgentRole.GUARDIAN: "approved",
-        }
+    def _evaluate_moderator(self, proposal: Proposal, prior_results: Optional[Dict] = None) -> Dict:
+        prior_results = prior_results or {}
+        
+        # Guardian rejection is a veto - no need to count the rest
+        guardian = prior_results.get(AgentRole.GUARDIAN)
+        if guardian is not None and guardian["rating"] == "reject":
+            return {
+                "role": self.role_value,
+                "position": "Final decision",
+                "rating": "rejected",
+                "reasoning": f"Guardian veto: {guardian['reasoning']}",
+                "consensus_reached": False
+            }
         
-        # Get actual ratings from evaluations (would come from LLM in real system)
+        # Count votes from the other members' evaluations
         approvals = 0
         rejections = 0
         
-        for role, rating in ratings.items():
-            if rating in ["support", "approved"]:
-                approvals += 1
-            elif rating == "reject":
+        for result in prior_results.values():
+            rating = result["rating"]
+            approvals += RATING_WEIGHTS.get(rating, 0)
+            if rating == "reject":
                 rejections += 1
-            elif rating == "conditional":
-                # Conditional counts as half approval
-                approvals += 0.5
         
         decision = "approved" if approvals > rejections else "rejected"
         
         return {
-            "role": self.role.value,
+            "role": self.role_value,
             "position": "Final decision",
             "rating": decision,
             "reasoning": f"{approvals:.1f} approvals vs {rejections:.1f} rejections",
             "consensus_reached": approvals >= 2
         }
 
+# Role -> evaluator table, built once instead of an if/elif chain per call
+CouncilMember._DISPATCH = {
+    AgentRole.STRATEGIST: CouncilMember._evaluate_strategist,
+    AgentRole.SKEPTIC: CouncilMember._evaluate_skeptic,
+    AgentRole.GUARDIAN: CouncilMember._evaluate_guardian,
+    AgentRole.MODERATOR: CouncilMember._evaluate_moderator,
+}
+
 class TrinityCouncil:
+    # Shared across instances so proposal ids never collide within a process
+    _id_counter = itertools.count()
+    
     def __init__(self):
         self.members = {
             AgentRole.STRATEGIST: CouncilMember(AgentRole.STRATEGIST),
@@ -138,13 +160,15 @@ class TrinityCouncil:
         }
         self.proposals: List[Proposal] = []
         self.decisions: List[Dict] = []
+        self._pending_by_id: Dict[str, Proposal] = {}
+        self.last_results: Dict[AgentRole, Dict] = {}
         
     def submit_proposal(self, title: str, description: str, domain: str, 
                        priority: int = 3, external_action: bool = False,
                        estimated_cost: float = 0.0, risk_level: str = "low") -> Proposal:
         """Submit a new proposal to the council"""
         proposal = Proposal(
-            id=f"prop_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            id=f"prop_{next(self._id_counter):08d}",
             title=title,
             description=description,
             proposed_by=domain,
@@ -156,21 +180,31 @@ class TrinityCouncil:
             risk_level=risk_level
         )
         self.proposals.append(proposal)
+        self._pending_by_id[proposal.id] = proposal
         return proposal
     
-    def deliberated(self, proposal: Proposal) -> Dict:
-        """Run full council deliberation on a proposal"""
+    def deliberated(self, proposal: Proposal, include_analysis: bool = False) -> Dict:
+        """Run full council deliberation on a proposal
+        
+        Per-member analysis is only rendered when include_analysis is set;
+        the raw member results of the latest run stay on last_results.
+        """
         results = {}
         votes = {}
         
         # Each member evaluates
         for role, member in self.members.items():
+            if role == AgentRole.MODERATOR:
+                continue
             result = member.evaluate(proposal)
             results[role] = result
-            votes[role.value] = result["rating"]
+            votes[member.role_value] = result["rating"]
         
-        # Moderator makes final call
-        moderator_result = results[AgentRole.MODERATOR]
+        # Moderator makes final call over the actual member results
+        moderator = self.members[AgentRole.MODERATOR]
+        moderator_result = moderator.evaluate(proposal, prior_results=results)
+        results[AgentRole.MODERATOR] = moderator_result
+        votes[moderator.role_value] = moderator_result["rating"]
         
         decision = {
             "proposal_id": proposal.id,
@@ -178,26 +212,34 @@ class TrinityCouncil:
             "domain": proposal.domain,
             "timestamp": datetime.now().isoformat(),
             "council_votes": votes,
-            "council_analysis": {
-                role.value: {
-                    "rating": r["rating"],
-                    "reasoning": r["reasoning"]
-                }
-                for role, r in results.items()
-            },
             "decision": moderator_result["rating"],
             "reasoning": moderator_result["reasoning"],
             "consensus": moderator_result["consensus_reached"],
             "requires_human_approval": proposal.external_action and moderator_result["rating"] != "approved"
         }
         
+        if include_analysis:
+            decision["council_analysis"] = {
+                r["role"]: {
+                    "rating": r["rating"],
+                    "reasoning": r["reasoning"]
+                }
+                for r in results.values()
+            }
+        self.last_results = results
+        
         self.decisions.append(decision)
+        self._pending_by_id.pop(proposal.id, None)
         
         return decision
     
+    @property
+    def pending_count(self) -> int:
+        """Number of proposals awaiting decision (O(1))"""
+        return len(self._pending_by_id)
+    
     def get_pending_proposals(self) -> List[Dict]:
         """Get proposals awaiting decision"""
-        decided_ids = {d["proposal_id"] for d in self.decisions}
         return [
             {
                 "id": p.id,
@@ -206,13 +248,17 @@ class TrinityCouncil:
                 "priority": p.priority,
                 "external_action": p.external_action
             }
-            for p in self.proposals if p.id not in decided_ids
+            for p in self._pending_by_id.values()
         ]
     
     def export_decisions(self, filepath: str = "council_decisions.json"):
         """Export all decisions to JSON"""
-        with open(filepath, 'w') as f:
-            json.dump(self.decisions, f, indent=2, default=str)
+        if orjson is not None:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(self.decisions, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump(self.decisions, f, indent=2, default=str)
         return filepath
 
 if __name__ == "__main__":
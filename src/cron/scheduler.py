@@ -5,14 +5,26 @@ Heartbeat, Daily Brief, Weekly Synthesis, Drift Audit
 """
 
 import asyncio
+import copy
+import functools
+import heapq
 import subprocess
+from collections import deque
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Callable, Optional
 from pathlib import Path
+import http.client
 import json
+import socket
+import threading
 
-@dataclass
+MAX_RESULTS = 256  # run history kept in memory (oldest dropped first)
+MAX_CONSECUTIVE_FAILURES = 1000
+MAX_OUTPUT_BYTES = 1000  # stdout kept per run
+MAX_ERROR_BYTES = 500  # stderr kept per run
+
+@dataclass(slots=True)
 class CronJob:
     name: str
     schedule: str  # "hourly", "daily", "weekly", "monthly"
@@ -24,84 +36,198 @@ class CronJob:
     last_run: Optional[datetime] = None
     last_status: Optional[str] = None
     consecutive_failures: int = 0
+    priority: int = 0  # higher runs first among jobs equally late
+    # A slot missed by more than this is skipped rather than caught up;
+    # None takes the schedule's default from _DEFAULT_MAX_SKEW
+    max_skew: Optional[timedelta] = None
+    # Resolved from schedule by CronScheduler.add_job
+    _next_fire_fn: Optional[Callable] = field(default=None, init=False, repr=False, compare=False)
+
+async def _read_bounded(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Read a stream to EOF, keeping only the first `limit` bytes"""
+    head = bytearray()
+    while chunk := await stream.read(65536):
+        if len(head) < limit:
+            head += chunk[:limit - len(head)]
+    return bytes(head)
+
+def _require_no_running_loop(alternative: str):
+    """Sync wrappers use asyncio.run, which can't nest; point async callers elsewhere"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise RuntimeError(f"cannot be called from a running event loop; await {alternative}() instead")
+
+def _period_start(job: CronJob, now: datetime) -> datetime:
+    """Start of the hour/day/week that contains now, for the job's schedule"""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if job.schedule == "hourly":
+        return now.replace(minute=0, second=0, microsecond=0)
+    elif job.schedule == "weekly":
+        return midnight - timedelta(days=now.weekday())
+    return midnight
+
+def _next_hourly(job: CronJob, after: datetime) -> datetime:
+    fire = after.replace(minute=job.minute, second=0, microsecond=0)
+    return fire if fire > after else fire + timedelta(hours=1)
+
+def _next_daily(job: CronJob, after: datetime) -> datetime:
+    fire = after.replace(hour=job.hour or 0, minute=job.minute, second=0, microsecond=0)
+    return fire if fire > after else fire + timedelta(days=1)
+
+def _next_weekly(job: CronJob, after: datetime) -> datetime:
+    fire = after.replace(hour=job.hour or 0, minute=job.minute, second=0, microsecond=0)
+    fire += timedelta(days=(job.day_of_week - after.weekday()) % 7)
+    return fire if fire > after else fire + timedelta(weeks=1)
+
+# schedule -> next-fire-time function (first slot strictly after `after`)
+_NEXT_FIRE: dict[str, Callable[[CronJob, datetime], datetime]] = {
+    "hourly": _next_hourly,
+    "daily": _next_daily,
+    "weekly": _next_weekly,
+}
+
+# Hourly jobs just wait for their next slot; daily and weekly ones always
+# catch up a missed run, since the next slot is too far away
+_DEFAULT_MAX_SKEW = {
+    "hourly": timedelta(minutes=5),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+# Due jobs late by the same number of these seconds are ordered by priority
+LATENESS_BAND = 60.0
 
 class CronScheduler:
     def __init__(self):
         self.jobs: list[CronJob] = []
-        self.results: list[dict] = []
+        self.results: deque[dict] = deque(maxlen=MAX_RESULTS)
+        # (next_fire epoch seconds, insertion order, job) - order breaks ties
+        self._heap: list[tuple[float, int, CronJob]] = []
         
-    def add_job(self, job: CronJob):
+    def add_job(self, job: CronJob, now: Optional[datetime] = None):
         """Add a cron job"""
+        now = now or datetime.now()
+        order = len(self.jobs)
         self.jobs.append(job)
         
-    def get_due_jobs(self) -> list[CronJob]:
-        """Get jobs that are due to run"""
-        now = datetime.now()
+        job._next_fire_fn = _NEXT_FIRE.get(job.schedule)
+        if job._next_fire_fn is None:
+            return  # unsupported schedule - registered but never fires
+        if job.max_skew is None:
+            job.max_skew = _DEFAULT_MAX_SKEW[job.schedule]
+        
+        # A job that has never run fires for the current period if its slot passed
+        after = job.last_run or _period_start(job, now) - timedelta(microseconds=1)
+        next_fire = job._next_fire_fn(job, after)
+        heapq.heappush(self._heap, (next_fire.timestamp(), order, job))
+        
+    def get_due_jobs(self, now: Optional[datetime] = None) -> list[CronJob]:
+        """Get jobs that are due to run, longest-waiting first
+        
+        Due jobs are rescheduled for their next slot as they are returned.
+        A missed slot (scheduler not running) fires once on the next tick
+        and then advances to the following slot rather than being lost,
+        unless it is more than the job's max_skew late; then it is skipped.
+        Jobs in the same LATENESS_BAND run highest priority first.
+        """
+        now = now or datetime.now()
         due = []
         
-        for job in self.jobs:
+        # Peek with float compares; calendar arithmetic only for jobs that fire
+        now_ts = now.timestamp()
+        while self._heap and self._heap[0][0] <= now_ts:
+            fire_ts, order, job = heapq.heappop(self._heap)
+            next_fire = job._next_fire_fn(job, now)
+            heapq.heappush(self._heap, (next_fire.timestamp(), order, job))
             if not job.enabled:
                 continue
-                
-            if job.schedule == "hourly":
-                if job.last_run is None or (now - job.last_run).total_seconds() >= 3600:
-                    if now.minute >= job.minute:
-                        due.append(job)
-                        
-            elif job.schedule == "daily":
-                if job.last_run is None or job.last_run.date() < now.date():
-                    if now.hour >= job.hour and now.minute >= job.minute:
-                        due.append(job)
-                        
-            elif job.schedule == "weekly":
-                if job.last_run is None or (now - job.last_run).total_seconds() >= 604800:
-                    if now.weekday() == job.day_of_week and now.hour >= job.hour:
-                        due.append(job)
-                        
-        return due
+            
+            aging = now_ts - fire_ts
+            if aging > job.max_skew.total_seconds():
+                print(f"[Cron] Skipping missed run of {job.name} ({aging / 60:.0f} min late)")
+                continue
+            band = int(aging // LATENESS_BAND)
+            if band:
+                print(f"[Cron] Catching up missed run of {job.name}")
+            due.append((band, job.priority, aging, job))
+        
+        due.sort(key=lambda d: d[:3], reverse=True)
+        return [job for _, _, _, job in due]
     
-    def run_job(self, job: CronJob) -> dict:
-        """Execute a cron job"""
-        start = datetime.now()
+    def next_wake_in(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the earliest scheduled job (0 if overdue, None if none)"""
+        if not self._heap:
+            return None
+        now_ts = (now or datetime.now()).timestamp()
+        return max(0.0, self._heap[0][0] - now_ts)
+    
+    def run_job(self, job: CronJob, now: Optional[datetime] = None) -> dict:
+        """Execute a cron job, reusing the scheduling tick's clock reading
+        
+        Blocking; from a coroutine use run_job_async.
+        """
+        _require_no_running_loop("run_job_async")
+        return asyncio.run(self.run_job_async(job, now))
+    
+    async def run_job_async(self, job: CronJob, now: Optional[datetime] = None) -> dict:
+        """Execute a cron job without blocking the event loop"""
+        now = now or datetime.now()
         result = {
             "job": job.name,
-            "start": start.isoformat(),
+            "start": now.isoformat(),
             "success": False,
             "output": "",
             "error": ""
         }
         
         try:
-            # Run the command
-            proc = subprocess.run(
+            proc = await asyncio.create_subprocess_shell(
                 job.command,
-                shell=True,
-                capture_output=True,
-                timeout=300  # 5 min timeout
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
+            try:
+                # Keep only the head of each stream; the rest is drained and dropped
+                stdout, stderr, _ = await asyncio.wait_for(asyncio.gather(
+                    _read_bounded(proc.stdout, MAX_OUTPUT_BYTES),
+                    _read_bounded(proc.stderr, MAX_ERROR_BYTES),
+                    proc.wait()
+                ), timeout=300)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise subprocess.TimeoutExpired(job.command, 300)
             result["success"] = proc.returncode == 0
-            result["output"] = proc.stdout.decode()[:1000]
-            result["error"] = proc.stderr.decode()[:500]
+            result["output"] = stdout.decode(errors="replace")
+            result["error"] = stderr.decode(errors="replace")
             job.consecutive_failures = 0 if result["success"] else job.consecutive_failures + 1
             
         except Exception as e:
             result["error"] = str(e)
             job.consecutive_failures += 1
             
+        return self._record(job, now, result)
+    
+    async def run_due(self, now: Optional[datetime] = None) -> list[dict]:
+        """Run every due job concurrently; wall time is the slowest job"""
+        now = now or datetime.now()
+        due = self.get_due_jobs(now)
+        return list(await asyncio.gather(*(self.run_job_async(job, now) for job in due)))
+    
+    def _record(self, job: CronJob, now: datetime, result: dict) -> dict:
+        """Stamp completion on a job result and keep it in history"""
         result["end"] = datetime.now().isoformat()
-        job.last_run = datetime.now()
+        job.last_run = now
         job.last_status = "ok" if result["success"] else "failed"
+        job.consecutive_failures = min(job.consecutive_failures, MAX_CONSECUTIVE_FAILURES)
         
         self.results.append(result)
         return result
 
-def create_heartbeat_job() -> CronJob:
-    """Create heartbeat health check job"""
-    return CronJob(
-        name="heartbeat",
-        schedule="hourly",
-        minute=0,
-        command="""
+# Command bodies are stripped once at import time
+_HEARTBEAT_CMD = """
 echo "[$(date)] Heartbeat check..."
 # Check gateway
 curl -s http://127.0.0.1:18789/health || echo "Gateway unhealthy"
@@ -110,31 +236,16 @@ pg_isready -h localhost -p 5432 || echo "DB unreachable"
 # Log result
 echo "Heartbeat complete"
 """.strip()
-    )
 
-def create_backup_job() -> CronJob:
-    """Create git backup job"""
-    return CronJob(
-        name="backup_git",
-        schedule="hourly",
-        minute=5,
-        command="""
-cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect
+_BACKUP_CMD = """
+cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect || exit 1
 git add -A
 git commit -m "Hourly Snapshot $(date +'%Y-%m-%d %H:%M')" || true
 git push origin main || echo "Push failed"
 """.strip()
-    )
 
-def create_daily_brief_job() -> CronJob:
-    """Create daily brief job (7 AM)"""
-    return CronJob(
-        name="daily_brief",
-        schedule="daily",
-        hour=7,
-        minute=0,
-        command="""
-cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect
+_DAILY_BRIEF_CMD = """
+cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect || exit 1
 python3 -c "
 from src.council import TrinityCouncil
 from src.memory import DualDomainMemory
@@ -159,8 +270,78 @@ brief = '''# Daily Brief - ''' + datetime.now().strftime('%Y-%m-%d') + '''
 print(brief)
 "
 """.strip()
+
+_WEEKLY_SYNTHESIS_CMD = """
+cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect || exit 1
+echo "# Weekly Synthesis - $(date +'%Y-%m-%d')" >> outputs/weekly_synthesis.md
+echo "Generated: $(date)" >> outputs/weekly_synthesis.md
+echo "TODO: Summarize week's decisions and learnings" >> outputs/weekly_synthesis.md
+""".strip()
+
+_DRIFT_AUDIT_CMD = """
+cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect || exit 1
+python3 -c "
+from datetime import datetime
+print(f'Drift Audit - {datetime.now().isoformat()}')
+print('Checking for configuration drift...')
+print('TODO: Implement drift detection')
+"
+""".strip()
+
+_MEMORY_CONSOLIDATION_CMD = """
+cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect || exit 1
+python3 -c "
+from datetime import date, timedelta
+from src.memory import DualDomainMemory
+
+# Render yesterday's JSONL memory logs as markdown
+DualDomainMemory().consolidate_daily((date.today() - timedelta(days=1)).isoformat())
+"
+""".strip()
+
+def _cached_job(factory):
+    """Build the job once; hand out shallow copies since CronJob is mutable"""
+    cached = functools.lru_cache(maxsize=1)(factory)
+    
+    @functools.wraps(factory)
+    def wrapper() -> CronJob:
+        return copy.copy(cached())
+    
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+@_cached_job
+def create_heartbeat_job() -> CronJob:
+    """Create heartbeat health check job"""
+    return CronJob(
+        name="heartbeat",
+        schedule="hourly",
+        minute=0,
+        command=_HEARTBEAT_CMD
+    )
+
+@_cached_job
+def create_backup_job() -> CronJob:
+    """Create git backup job"""
+    return CronJob(
+        name="backup_git",
+        schedule="hourly",
+        minute=5,
+        command=_BACKUP_CMD
+    )
+
+@_cached_job
+def create_daily_brief_job() -> CronJob:
+    """Create daily brief job (7 AM)"""
+    return CronJob(
+        name="daily_brief",
+        schedule="daily",
+        hour=7,
+        minute=0,
+        command=_DAILY_BRIEF_CMD
     )
 
+@_cached_job
 def create_weekly_synthesis_job() -> CronJob:
     """Create weekly synthesis job (Sunday 11 PM)"""
     return CronJob(
@@ -169,14 +350,10 @@ def create_weekly_synthesis_job() -> CronJob:
         day_of_week=6,  # Sunday
         hour=23,
         minute=0,
-        command="""
-cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect
-echo "# Weekly Synthesis - $(date +'%Y-%m-%d')" >> outputs/weekly_synthesis.md
-echo "Generated: $(date)" >> outputs/weekly_synthesis.md
-echo "TODO: Summarize week's decisions and learnings" >> outputs/weekly_synthesis.md
-""".strip()
+        command=_WEEKLY_SYNTHESIS_CMD
     )
 
+@_cached_job
 def create_drift_audit_job() -> CronJob:
     """Create drift audit job (4 AM daily)"""
     return CronJob(
@@ -184,15 +361,18 @@ def create_drift_audit_job() -> CronJob:
         schedule="daily",
         hour=4,
         minute=0,
-        command="""
-cd ~/vibe_coding_projects/CLAWD-BOSS/personal-ai-architect
-python3 -c "
-from datetime import datetime
-print(f'Drift Audit - {datetime.now().isoformat()}')
-print('Checking for configuration drift...')
-print('TODO: Implement drift detection')
-"
-""".strip()
+        command=_DRIFT_AUDIT_CMD
+    )
+
+@_cached_job
+def create_memory_consolidation_job() -> CronJob:
+    """Create nightly memory log consolidation job (00:15 daily)"""
+    return CronJob(
+        name="memory_consolidation",
+        schedule="daily",
+        hour=0,
+        minute=15,
+        command=_MEMORY_CONSOLIDATION_CMD
     )
 
 class HeartbeatService:
@@ -200,29 +380,52 @@ class HeartbeatService:
     def __init__(self):
         self.last_beat = None
         self.status = "unknown"
+        # Keep-alive connection to the gateway, reused across checks
+        self._gateway_conn: Optional[http.client.HTTPConnection] = None
+        self._gateway_lock = threading.Lock()
         
-    def check(self) -> dict:
-        """Perform heartbeat check"""
+    def _check_gateway(self) -> str:
+        with self._gateway_lock:
+            while True:
+                reused = self._gateway_conn is not None
+                if not reused:
+                    self._gateway_conn = http.client.HTTPConnection("127.0.0.1", 18789, timeout=5)
+                try:
+                    self._gateway_conn.request("GET", "/health")
+                    r = self._gateway_conn.getresponse()
+                    r.read()  # drain so the connection can be reused
+                    return "ok" if r.status == 200 else "error"
+                except Exception:
+                    self._gateway_conn.close()
+                    self._gateway_conn = None
+                    # Only a kept-alive socket the server has since closed earns a
+                    # retry; a fresh connection failing means the gateway is down
+                    if not reused:
+                        return "unreachable"
+    
+    def _check_db(self) -> str:
+        # A TCP connect answers "is postgres accepting connections" without
+        # forking pg_isready on every beat
+        try:
+            with socket.create_connection(("localhost", 5432), timeout=5):
+                return "ok"
+        except OSError:
+            return "error"
+    
+    async def check_async(self, now: Optional[datetime] = None) -> dict:
+        """Perform heartbeat check, running the independent probes in parallel"""
         result = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": (now or datetime.now()).isoformat(),
             "checks": {}
         }
         
-        # Check gateway
-        try:
-            import requests
-            r = requests.get("http://127.0.0.1:18789/health", timeout=5)
-            result["checks"]["gateway"] = "ok" if r.status_code == 200 else "error"
-        except:
-            result["checks"]["gateway"] = "unreachable"
-            
-        # Check DB
-        import subprocess
-        p = subprocess.run(
-            ["pg_isready", "-h", "localhost", "-p", "5432"],
-            capture_output=True, timeout=5
+        loop = asyncio.get_running_loop()
+        gateway, database = await asyncio.gather(
+            loop.run_in_executor(None, self._check_gateway),
+            loop.run_in_executor(None, self._check_db)
         )
-        result["checks"]["database"] = "ok" if p.returncode == 0 else "error"
+        result["checks"]["gateway"] = gateway
+        result["checks"]["database"] = database
         
         # Overall status
         all_ok = all(v == "ok" for v in result["checks"].values())
@@ -232,6 +435,11 @@ class HeartbeatService:
         self.status = result["status"]
         
         return result
+    
+    def check(self, now: Optional[datetime] = None) -> dict:
+        """Perform heartbeat check (blocking; from a coroutine use check_async)"""
+        _require_no_running_loop("check_async")
+        return asyncio.run(self.check_async(now))
 
 if __name__ == "__main__":
     # Initialize scheduler
@@ -241,6 +449,7 @@ if __name__ == "__main__":
     scheduler.add_job(create_daily_brief_job())
     scheduler.add_job(create_weekly_synthesis_job())
     scheduler.add_job(create_drift_audit_job())
+    scheduler.add_job(create_memory_consolidation_job())
     
     print("Cron Jobs Registered:")
     for job in scheduler.jobs:
@@ -4,42 +4,109 @@ Personal AI Architect - Enhanced with Skills
 Morning Briefings, Auto-Approve, Task Management, Health Monitoring
 """
 
+import asyncio
+import functools
+import json
 import os
+import re
+import selectors
 import sys
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional C-accelerated JSON
+    orjson = None
+
 # Add src to path
 src_dir = Path(__file__).parent
 sys.path.insert(0, str(src_dir.parent))
 
 from src.council import TrinityCouncil
 from src.memory import DualDomainMemory
-from src.cron.scheduler import CronScheduler, create_heartbeat_job, create_backup_job
+from src.cron.scheduler import CronScheduler, create_heartbeat_job, create_backup_job, create_memory_consolidation_job
 from src.channels.adapters import ChannelRouter, WebChatAdapter
 from src.nl_parser import NLParser, ConversationManager
-from src.skills.morning_briefing import MorningBriefingSkill, AutoApproveRules, TaskManager, HealthMonitor
+from src.skills.morning_briefing import MorningBriefingSkill, AutoApproveRules, HealthMonitor
+from src.skills.tasks import TaskManager
+
+# Shared components, built once per process and reused by every architect
+@functools.lru_cache(maxsize=1)
+def _council() -> TrinityCouncil:
+    return TrinityCouncil()
+
+@functools.lru_cache(maxsize=1)
+def _memory() -> DualDomainMemory:
+    return DualDomainMemory()
+
+@functools.lru_cache(maxsize=1)
+def _router() -> ChannelRouter:
+    router = ChannelRouter()
+    router.register("webchat", WebChatAdapter())
+    return router
+
+# (path, mtime_ns, size) of the state file last read or written, and its contents
+_state_cache = (None, None)
+
+def clear_caches():
+    """Drop the shared components so the next architect builds fresh ones"""
+    if _memory.cache_info().currsize:
+        _memory().close()
+    for factory in (_council, _memory, _router):
+        factory.cache_clear()
 
 class PersonalAIArchitect:
     """Enhanced Personal AI Architect with skills"""
     
+    _STATUS_TMPL = """# Personal AI Architect Status
+
+**Active Domain:** {domain}
+**Started:** {started}
+**Uptime:** {uptime}
+
+**Memory:**
+- Personal entries: {personal_entries}
+- Work entries: {work_entries}
+
+**Tasks:** {tasks_pending} pending
+
+**Council:**
+- Pending proposals: {pending_proposals}
+- Total decisions: {decisions}
+
+**Skills:**
+- Morning Briefing: ✅
+- Auto-Approve: ✅
+- Task Manager: ✅
+- Health Monitor: ✅
+
+**Cron Jobs:** {cron_jobs} registered
+"""
+    
+    QUERY_CACHE_SIZE = 128
+    
     def __init__(self):
         self.started = datetime.now()
-        self.council = TrinityCouncil()
-        self.memory = DualDomainMemory()
-        self.router = ChannelRouter()
-        self.router.register("webchat", WebChatAdapter())
+        self.council = _council()
+        self.memory = _memory()
+        self.router = _router()
         
-        # Skills
-        self.briefing = MorningBriefingSkill()
-        self.auto_approve = AutoApproveRules()
+        # Skills - per architect, since the briefing lists this architect's tasks
         self.tasks = TaskManager()
+        self.briefing = MorningBriefingSkill(task_manager=self.tasks)
+        self.auto_approve = AutoApproveRules()
         self.health = HealthMonitor()
         
         # Crons
         self.crons = CronScheduler()
         self.crons.add_job(create_heartbeat_job())
         self.crons.add_job(create_backup_job())
+        self.crons.add_job(create_memory_consolidation_job())
+        
+        # (lowercased query, domain) -> (memory count when cached, results)
+        self._query_cache: OrderedDict = OrderedDict()
         
         # State
         self.active_domain = "personal"
@@ -54,9 +121,22 @@ class PersonalAIArchitect:
     
     # Memory operations
     def query_memory(self, query: str, domain: str = None):
-        results = self.memory.query_all(query, domain or self.active_domain)
-        response = f"Query: '{query}'\n\n"
         domain_name = domain or self.active_domain
+        key = (query.lower(), domain_name)
+        # The entry count guards against writes that bypass remember()
+        generation = self.memory.personal.count + self.memory.work.count
+        cached = self._query_cache.get(key)
+        if cached is not None and cached[0] == generation:
+            self._query_cache.move_to_end(key)
+            results = cached[1]
+        else:
+            results = self.memory.query_all(query, domain_name)
+            self._query_cache[key] = (generation, results)
+            self._query_cache.move_to_end(key)
+            if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        response = f"Query: '{query}'\n\n"
         response += f"[{domain_name.upper()}]\n"
         
         if results.get(domain_name):
@@ -71,6 +151,7 @@ class PersonalAIArchitect:
             self.memory.add_personal(category, content, importance)
         else:
             self.memory.add_work(category, content, importance)
+        self._query_cache.clear()
         return f"✅ Saved to {self.active_domain} memory"
     
     # Task management
@@ -114,65 +195,196 @@ class PersonalAIArchitect:
     
     # Status
     def get_status(self):
-        return f"""# Personal AI Architect Status
-
-**Active Domain:** {self.active_domain}
-**Started:** {self.started.strftime('%Y-%m-%d %H:%M:%S')}
-**Uptime:** {datetime.now() - self.started}
-
-**Memory:**
-- Personal entries: {len(self.memory.personal._entries)}
-- Work entries: {len(self.memory.work._entries)}
-
-**Tasks:** {len([t for t in self.tasks.tasks if t['status'] == 'pending'])} pending
-
-**Council:**
-- Pending proposals: {len(self.council.get_pending_proposals())}
-- Total decisions: {len(self.council.decisions)}
-
-**Skills:**
-- Morning Briefing: ✅
-- Auto-Approve: ✅
-- Task Manager: ✅
-- Health Monitor: ✅
-
-**Cron Jobs:** {len(self.crons.jobs)} registered
-"""
+        return self._STATUS_TMPL.format(
+            domain=self.active_domain,
+            started=self.started.strftime('%Y-%m-%d %H:%M:%S'),
+            uptime=datetime.now() - self.started,
+            personal_entries=self.memory.personal.count,
+            work_entries=self.memory.work.count,
+            tasks_pending=self.tasks.pending_count(),
+            pending_proposals=self.council.pending_count,
+            decisions=len(self.council.decisions),
+            cron_jobs=len(self.crons.jobs)
+        )
     
     def run_crons(self):
-        due = self.crons.get_due_jobs()
-        if not due:
+        results = asyncio.run(self.crons.run_due())
+        if not results:
             return "No cron jobs due right now."
-        results = []
-        for job in due:
-            result = self.crons.run_job(job)
-            status = "✅" if result["success"] else "❌"
-            results.append(f"{status} {job.name}")
-        return "\n".join(results)
+        return "\n".join(
+            f"{'✅' if result['success'] else '❌'} {result['job']}"
+            for result in results
+        )
     
     # Persistence
     def save_state(self):
         state = {
             "active_domain": self.active_domain,
             "started": self.started.isoformat(),
-            "pending_proposals": len(self.council.get_pending_proposals()),
-            "memory_personal": len(self.memory.personal._entries),
-            "memory_work": len(self.memory.work._entries),
-            "tasks_pending": len([t for t in self.tasks.tasks if t['status'] == 'pending']),
+            "pending_proposals": self.council.pending_count,
+            "memory_personal": self.memory.personal.count,
+            "memory_work": self.memory.work.count,
+            "tasks_pending": self.tasks.pending_count(),
             "last_saved": datetime.now().isoformat()
         }
-        import json
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+        # Write-then-rename so a crash mid-write never truncates the state file
+        tmp = self.state_file.with_suffix(".tmp")
+        if orjson is not None:
+            tmp.write_bytes(orjson.dumps(state))
+        else:
+            tmp.write_text(json.dumps(state, separators=(",", ":")))
+        os.replace(tmp, self.state_file)
+        self._remember_state(state)
+        self.memory.save_embed_cache()
+    
+    def _state_key(self):
+        st = self.state_file.stat()
+        return (str(self.state_file), st.st_mtime_ns, st.st_size)
+    
+    def _remember_state(self, state: dict, key=None):
+        global _state_cache
+        _state_cache = (key or self._state_key(), state)
     
     def load_state(self):
-        if self.state_file.exists():
-            import json
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
-            self.active_domain = state.get("active_domain", "personal")
-            return True
-        return False
+        if not self.state_file.exists():
+            return False
+        key = self._state_key()
+        if key[2] == 0:
+            print(f"[State] {self.state_file} is empty, ignoring it")
+            return False
+        
+        # Unchanged since this process last read or wrote it - skip the decode
+        if _state_cache[0] == key:
+            state = _state_cache[1]
+        else:
+            data = self.state_file.read_bytes()
+            state = orjson.loads(data) if orjson is not None else json.loads(data)
+            self._remember_state(state, key)
+        self.active_domain = state.get("active_domain", "personal")
+        return True
+
+
+_LOCATION_RE = re.compile(r"for (\w+)")
+
+# REPL shortcuts handled before NL parsing; handlers take (architect, args)
+def _cmd_briefing(architect, args):
+    return architect.generate_briefing()
+
+def _cmd_health(architect, args):
+    return architect.check_health()
+
+def _cmd_list_tasks(architect, args):
+    return architect.list_tasks()
+
+def _cmd_add_task(architect, args):
+    return architect.add_task(args)
+
+def _cmd_complete_task(architect, args):
+    return architect.complete_task(args)
+
+def _cmd_configure_briefing(architect, args):
+    location = _LOCATION_RE.search(args)
+    if location:
+        return architect.configure_briefing(location=location.group(1))
+    return architect.configure_briefing()
+
+QUIT_COMMANDS = {"quit", "exit", "q", "bye"}
+
+# Whole (lowercased) input -> handler
+EXACT_COMMANDS = {
+    "briefing": _cmd_briefing,
+    "morning briefing": _cmd_briefing,
+    "give me a morning briefing": _cmd_briefing,
+    "health": _cmd_health,
+    "check health": _cmd_health,
+    "system health": _cmd_health,
+    "tasks": _cmd_list_tasks,
+    "list tasks": _cmd_list_tasks,
+    "show tasks": _cmd_list_tasks,
+    "what are my tasks": _cmd_list_tasks,
+}
+
+# First word -> (required start of the rest, handler); remainder becomes args
+PREFIX_COMMANDS = {
+    "task": ("", _cmd_add_task),
+    "add": ("task ", _cmd_add_task),
+    "complete": ("", _cmd_complete_task),
+    "done": ("", _cmd_complete_task),
+    "configure": ("briefing", _cmd_configure_briefing),
+}
+
+def dispatch_command(architect, cmd: str):
+    """Run a REPL shortcut; returns None when cmd should go to the NL parser"""
+    handler = EXACT_COMMANDS.get(cmd.lower())
+    if handler:
+        return handler(architect, "")
+    
+    head, sep, rest = cmd.partition(" ")
+    entry = PREFIX_COMMANDS.get(head.lower())
+    if entry and sep:
+        lead, handler = entry
+        if rest.lower().startswith(lead):
+            return handler(architect, rest[len(lead):].strip())
+    return None
+
+
+class _LineReader:
+    """Whole lines read straight from a file descriptor
+    
+    select() only watches the descriptor, so input must not sit in a
+    Python-level buffer (as sys.stdin.readline leaves pasted lines).
+    """
+    
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.eof = False
+        self._buf = b""
+    
+    def fill(self):
+        """Read whatever is available; call only when select() says readable"""
+        data = os.read(self.fd, 65536)
+        if data:
+            self._buf += data
+        else:
+            self.eof = True
+    
+    def pop_line(self):
+        """Next complete line (without newline), or None if none is buffered"""
+        line, sep, rest = self._buf.partition(b"\n")
+        if not sep:
+            if not (self.eof and line):
+                return None
+            rest = b""  # last line without a trailing newline
+        self._buf = rest
+        return line.decode(errors="replace")
+
+
+def _read_command(sel, reader, architect, max_idle: float = 60.0):
+    """Prompt for a command, running crons as they come due; None at EOF
+    
+    Sleeps until the next scheduled job rather than polling; max_idle caps
+    the wait so wall-clock jumps (suspend, clock changes) are noticed.
+    """
+    prompt = f"\n[{architect.active_domain}] > "
+    if sel is None:
+        try:
+            return input(prompt)
+        except EOFError:
+            return None
+    
+    print(prompt, end="", flush=True)
+    while True:
+        line = reader.pop_line()
+        if line is not None:
+            return line
+        if reader.eof:
+            return None
+        wait = architect.crons.next_wake_in()
+        if sel.select(timeout=max_idle if wait is None else min(wait, max_idle)):
+            reader.fill()
+        elif architect.crons.next_wake_in() == 0:
+            print(f"\n{architect.run_crons()}")
+            print(prompt, end="", flush=True)
 
 
 def main():
@@ -197,45 +409,35 @@ def main():
     print("  • 'Configure briefing for SF weather'")
     print("=" * 60)
     
+    # Poll stdin so crons keep ticking while the prompt is idle
+    sel = selectors.DefaultSelector()
+    reader = None
+    try:
+        sel.register(sys.stdin.fileno(), selectors.EVENT_READ)
+        reader = _LineReader(sys.stdin.fileno())
+    except (ValueError, OSError):
+        sel = None  # stdin can't be polled here (e.g. Windows console)
+    
     # Interactive loop
     while True:
         try:
-            cmd = input(f"\n[{architect.active_domain}] > ").strip()
+            cmd = _read_command(sel, reader, architect)
+            if cmd is None:
+                cmd = "quit"  # end of input behaves like quit
+            cmd = cmd.strip()
             
             if not cmd:
                 continue
                 
-            if cmd.lower() in ["quit", "exit", "q", "bye"]:
+            if cmd.lower() in QUIT_COMMANDS:
                 architect.save_state()
                 print("Goodbye! 👋")
                 break
             
             # Handle special commands
-            if cmd.lower() in ["briefing", "morning briefing", "give me a morning briefing"]:
-                print(f"\n{architect.generate_briefing()}")
-                continue
-            elif cmd.lower() in ["health", "check health", "system health"]:
-                print(f"\n{architect.check_health()}")
-                continue
-            elif cmd.lower().startswith("task ") or cmd.lower().startswith("add task "):
-                task = cmd.replace("add task ", "").replace("task ", "").strip()
-                print(f"\n{architect.add_task(task)}")
-                continue
-            elif cmd.lower() in ["tasks", "list tasks", "show tasks", "what are my tasks"]:
-                print(f"\n{architect.list_tasks()}")
-                continue
-            elif cmd.lower().startswith("complete ") or cmd.lower().startswith("done "):
-                task_id = cmd.replace("complete ", "").replace("done ", "").strip()
-                print(f"\n{architect.complete_task(task_id)}")
-                continue
-            elif cmd.lower().startswith("configure briefing"):
-                # Parse remaining kwargs
-                import re
-                location = re.search(r"for (\w+)", cmd)
-                if location:
-                    print(f"\n{architect.configure_briefing(location=location.group(1))}")
-                else:
-                    print(f"\n{architect.configure_briefing()}")
+            response = dispatch_command(architect, cmd)
+            if response is not None:
+                print(f"\n{response}")
                 continue
             
             # Default to NL processing
@@ -1,9 +1,10 @@
 # Personal AI Architect - Memory Module
 
-from .memory import DualDomainMemory, MemoryStore, MemoryEntry
+from .memory import DualDomainMemory, MemoryStore, MemoryEntry, Embedder
 
 __all__ = [
     "DualDomainMemory",
     "MemoryStore", 
-    "MemoryEntry"
+    "MemoryEntry",
+    "Embedder"
 ]
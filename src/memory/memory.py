@@ -4,17 +4,62 @@ Dual-Domain Memory System
 Personal and Work contexts with automatic memory consolidation
 """
 
+import atexit
+import bisect
 import os
 import json
-from datetime import datetime, timedelta
+import functools
+import hashlib
+import itertools
+import mmap
+import sys
+import time
+import weakref
+from array import array
+from collections import defaultdict, deque
+from datetime import datetime
 from dataclasses import dataclass, field, asdict
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Protocol, Sequence, Set
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for semantic search
+    np = None
+
+try:
+    import orjson
+except ImportError:  # optional C-accelerated JSON
+    orjson = None
+
+try:
+    import faiss
+except ImportError:  # optional ANN index; numpy brute force is used otherwise
+    faiss = None
+
 BASE_DIR = Path(__file__).parent.parent.parent
 MEMORY_DIR = BASE_DIR / "memory"
 
-@dataclass
+# Minimum cosine similarity for a semantic hit
+SEMANTIC_THRESHOLD = 0.4
+# Hybrid ranking weights for semantic_query
+LEXICAL_WEIGHT = 0.4
+SEMANTIC_WEIGHT = 0.6
+# Near-duplicate content (3-gram Jaccard >= this) reuses a cached embedding
+SHINGLE_REUSE_THRESHOLD = 0.9
+# How many recent contents are compared by shingles on a hash miss
+SHINGLE_WINDOW = 256
+
+class Embedder(Protocol):
+    """Anything that turns text into a fixed-size vector
+    
+    An optional embed_batch(texts) is used for bulk embedding when present.
+    """
+    
+    def embed(self, text: str) -> Sequence[float]:
+        ...
+
+@dataclass(slots=True)
 class MemoryEntry:
     id: str
     timestamp: str
@@ -24,22 +69,65 @@ class MemoryEntry:
     importance: int  # 1-5
     tags: List[str] = field(default_factory=list)
     source: Optional[str] = None
+    ts_epoch: float = 0.0  # timestamp as epoch seconds, for cheap recency checks
+
+def _normalize_content(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def _shingles(text: str, size: int = 3) -> frozenset:
+    if len(text) <= size:
+        return frozenset((text,))
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+class _VectorIndex:
+    """Inner-product index over L2-normalized vectors (FAISS when available)"""
+    
+    def __init__(self):
+        self.ids: List[str] = []
+        self._faiss = None
+        self._matrix = None
     
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "timestamp": self.timestamp,
-            "category": self.category,
-            "domain": self.domain,
-            "content": self.content,
-            "importance": self.importance,
-            "tags": self.tags,
-            "source": self.source
-        }
+    def add(self, entry_ids: List[str], vectors):
+        """Append one row per entry id"""
+        mat = np.asarray(vectors, dtype="float32").reshape(len(entry_ids), -1)
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        mat /= np.where(norms == 0, 1.0, norms)
+        if faiss is not None:
+            if self._faiss is None:
+                self._faiss = faiss.IndexFlatIP(mat.shape[1])
+            self._faiss.add(mat)
+        elif self._matrix is None:
+            self._matrix = mat
+        else:
+            self._matrix = np.vstack((self._matrix, mat))
+        self.ids.extend(entry_ids)
+    
+    def search(self, query_vec, k: int) -> List[tuple]:
+        """Top-k (entry_id, cosine) pairs for a normalized query vector"""
+        if not self.ids:
+            return []
+        k = min(k, len(self.ids))
+        if self._faiss is not None:
+            scores, rows = self._faiss.search(query_vec.reshape(1, -1), k)
+            return [(self.ids[r], float(sc)) for sc, r in zip(scores[0], rows[0]) if r >= 0]
+        scores = self._matrix @ query_vec
+        rows = np.argsort(-scores)[:k]
+        return [(self.ids[r], float(scores[r])) for r in rows]
+
+# Live stores, so one exit hook closes their daily logs without pinning them
+_OPEN_STORES: "weakref.WeakSet[MemoryStore]" = weakref.WeakSet()
+
+@atexit.register
+def _close_open_stores():
+    for store in list(_OPEN_STORES):
+        store.close()
 
 class MemoryStore:
-    def __init__(self, domain: str):
-        self.domain = domain
+    # Suffix for entry ids so bulk inserts within one microsecond stay unique
+    _id_counter = itertools.count()
+    
+    def __init__(self, domain: str, embedder: Optional[Embedder] = None):
+        self.domain = sys.intern(domain)
         self.memory_dir = MEMORY_DIR / domain
         self.memory_dir.mkdir(parents=True, exist_ok=True)
         self.learnings_file = self.memory_dir / "LEARNINGS.md"
@@ -47,6 +135,36 @@ class MemoryStore:
         self.daily_dir = self.memory_dir / "daily"
         self.daily_dir.mkdir(exist_ok=True)
         self._entries: Dict[str, MemoryEntry] = {}
+        self.count = 0  # number of entries, kept alongside _entries
+        # Inverted index over lowercased content tokens
+        self._token_index: Dict[str, Set[str]] = defaultdict(set)
+        # Sorted vocabulary and sorted token suffixes (suffix -> tokens ending
+        # with it) for prefix/infix lookups; new tokens are folded in lazily
+        self._vocab: List[str] = []
+        self._suffix_keys: List[str] = []
+        self._suffix_tokens: Dict[str, Set[str]] = {}
+        self._pending_tokens: List[str] = []
+        self._lower_content: Dict[str, str] = {}
+        self._position: Dict[str, int] = {}
+        # Column arrays indexed by position, for filtering without touching entries
+        self._ids: List[str] = []
+        self._importance = array("h")
+        self._ts = array("d")  # epoch seconds
+        # Optional semantic layer
+        self.embedder = embedder
+        self._vectors = _VectorIndex() if embedder is not None and np is not None else None
+        self._query_vector = functools.lru_cache(maxsize=512)(self._embed_normalized)
+        # Content hash -> vector, plus recent shingle sets for near-duplicate reuse
+        # Plain arrays (.npz, no pickles): the memory dir is synced through git
+        self.embed_cache_file = self.memory_dir / ".embed_cache.npz"
+        self._embed_cache: Dict[str, object] = {}
+        self._recent_shingles: deque = deque(maxlen=SHINGLE_WINDOW)
+        if self._vectors is not None:
+            self._load_embed_cache()
+        # Daily JSONL log, kept open for the current date
+        self._daily_fp = None
+        self._daily_date: Optional[str] = None
+        _OPEN_STORES.add(self)
         self._load_existing()
         
     def _load_existing(self):
@@ -55,52 +173,329 @@ class MemoryStore:
             # Parse learnings markdown
             pass  # Would parse existing file
         
+        loads = orjson.loads if orjson is not None else json.loads
+        loaded = []
+        for log_file in sorted(self.daily_dir.glob("*.jsonl")):
+            if log_file.stat().st_size == 0:
+                continue  # mmap cannot map an empty file
+            with open(log_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b""):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = MemoryEntry(**loads(line))
+                    except (ValueError, TypeError):
+                        continue  # torn or foreign line
+                    if entry.id not in self._entries:
+                        self._entries[entry.id] = entry
+                        self._index_entry(entry)
+                        loaded.append(entry)
+        
+        if loaded and self._vectors is not None:
+            self._vectors.add([e.id for e in loaded],
+                              self._embed_contents([e.content for e in loaded]))
+        
     def add(self, category: str, content: str, importance: int = 3, 
             tags: List[str] = None, source: str = None) -> MemoryEntry:
         """Add a new memory entry"""
+        entry = self._new_entry(category, content, importance, tags, source)
+        if self._vectors is not None:
+            self._vectors.add([entry.id], self._embed_contents([content]))
+        self._save_entries([entry])
+        return entry
+    
+    def add_many(self, items: List[tuple]) -> List[MemoryEntry]:
+        """Add (category, content, importance, tags, source) tuples in bulk
+        
+        Embeds all contents in one embed_batch call when the embedder has it
+        and appends every daily-log line through a single file open.
+        """
+        entries = [self._new_entry(*item) for item in items]
+        if not entries:
+            return entries
+        if self._vectors is not None:
+            vectors = self._embed_contents([e.content for e in entries])
+            self._vectors.add([e.id for e in entries], vectors)
+        self._save_entries(entries)
+        return entries
+    
+    def _embed_contents(self, contents: List[str]) -> list:
+        """Vectors for contents, reusing cached ones for identical or near-identical text"""
+        vectors = [None] * len(contents)
+        misses = {}  # content hash -> (indexes, normalized text, shingles)
+        for i, content in enumerate(contents):
+            norm = _normalize_content(content)
+            key = hashlib.sha256(norm.encode()).hexdigest()
+            vec = self._embed_cache.get(key)
+            if vec is None and key not in misses:
+                shingles = _shingles(norm)
+                for recent, recent_key in self._recent_shingles:
+                    union = len(shingles | recent)
+                    if union and len(shingles & recent) / union >= SHINGLE_REUSE_THRESHOLD:
+                        vec = self._embed_cache[recent_key]
+                        self._embed_cache[key] = vec
+                        break
+                else:
+                    misses[key] = ([], content, shingles)
+            if vec is not None:
+                vectors[i] = vec
+            else:
+                misses[key][0].append(i)
+        
+        if misses:
+            texts = [content for _, content, _ in misses.values()]
+            embed_batch = getattr(self.embedder, "embed_batch", None)
+            if embed_batch is not None and len(texts) > 1:
+                fresh = embed_batch(texts)
+            else:
+                fresh = [self.embedder.embed(t) for t in texts]
+            for (key, (indexes, _, shingles)), vec in zip(misses.items(), fresh):
+                self._embed_cache[key] = vec
+                self._recent_shingles.append((shingles, key))
+                for i in indexes:
+                    vectors[i] = vec
+        return vectors
+    
+    def _load_embed_cache(self):
+        if not self.embed_cache_file.exists():
+            return
+        try:
+            with np.load(self.embed_cache_file, allow_pickle=False) as cached:
+                self._embed_cache.update(zip(cached["keys"].tolist(), cached["vectors"]))
+                # Recent shingle sets are stored flattened, with each set's size
+                shingles = cached["recent_shingles"].tolist()
+                bounds = np.cumsum(cached["recent_sizes"]).tolist()
+                for key, start, end in zip(cached["recent_keys"].tolist(), [0] + bounds, bounds):
+                    if key in self._embed_cache:
+                        self._recent_shingles.append((frozenset(shingles[start:end]), key))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Memory] Ignoring unreadable embedding cache: {e}")
+    
+    def save_embed_cache(self):
+        """Persist the embedding cache next to the memory files"""
+        if not self._embed_cache or np is None:
+            return
+        recent = list(self._recent_shingles)
+        tmp = self.embed_cache_file.with_suffix(".tmp")
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                keys=np.array(list(self._embed_cache), dtype=str),
+                vectors=np.asarray(list(self._embed_cache.values()), dtype="float32"),
+                recent_keys=np.array([key for _, key in recent], dtype=str),
+                recent_shingles=np.array([sh for shingles, _ in recent for sh in shingles], dtype=str),
+                recent_sizes=np.array([len(shingles) for shingles, _ in recent], dtype="int64")
+            )
+        os.replace(tmp, self.embed_cache_file)
+    
+    def _new_entry(self, category: str, content: str, importance: int = 3,
+                   tags: List[str] = None, source: str = None) -> MemoryEntry:
+        """Create, register and index an entry (without persisting it)"""
+        now = datetime.now()
         entry = MemoryEntry(
-            id=f"mem_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}",
-            timestamp=datetime.now().isoformat(),
+            id=f"mem_{now.strftime('%Y%m%d_%H%M%S_%f')}_{next(self._id_counter)}",
+            timestamp=now.isoformat(),
             category=category,
             domain=self.domain,
             content=content,
             importance=importance,
             tags=tags or [],
-            source=source
+            source=source,
+            ts_epoch=now.timestamp()
         )
         self._entries[entry.id] = entry
-        self._save_entry(entry)
+        self._index_entry(entry)
         return entry
     
-    def _save_entry(self, entry: MemoryEntry):
-        """Save entry to daily log"""
+    def _index_entry(self, entry: MemoryEntry):
+        """Add entry to the token index and lowercase cache"""
+        self.count += 1
+        # Low-cardinality labels share one string object across entries
+        entry.category = sys.intern(entry.category)
+        entry.domain = sys.intern(entry.domain)
+        entry.tags = [sys.intern(tag) for tag in entry.tags]
+        lower = entry.content.lower()
+        self._lower_content[entry.id] = lower
+        self._position[entry.id] = len(self._ids)
+        self._ids.append(entry.id)
+        self._importance.append(entry.importance)
+        if not entry.ts_epoch:  # logged before ts_epoch existed
+            entry.ts_epoch = datetime.fromisoformat(entry.timestamp).timestamp()
+        self._ts.append(entry.ts_epoch)
+        for token in set(lower.split()):
+            if token not in self._token_index:
+                self._pending_tokens.append(token)
+            self._token_index[token].add(entry.id)
+    
+    def _positions_above(self, column: array, threshold) -> List[int]:
+        """Positions whose column value is strictly greater than threshold"""
+        if not column:
+            return []
+        if np is not None:
+            return np.flatnonzero(np.frombuffer(column, dtype=column.typecode) > threshold).tolist()
+        return [i for i, value in enumerate(column) if value > threshold]
+    
+    def _sync_vocab(self):
+        """Fold tokens indexed since the last lookup into the sorted lists"""
+        pending = self._pending_tokens
+        if not pending:
+            return
+        new_suffixes = []
+        for token in pending:
+            for i in range(len(token)):
+                suffix = token[i:]
+                tokens = self._suffix_tokens.get(suffix)
+                if tokens is None:
+                    tokens = self._suffix_tokens[suffix] = set()
+                    new_suffixes.append(suffix)
+                tokens.add(token)
+        # Sorted run + sorted run: timsort merges them in linear time
+        for keys, new in ((self._vocab, pending), (self._suffix_keys, new_suffixes)):
+            new.sort()
+            keys.extend(new)
+            keys.sort()
+        self._pending_tokens = []
+    
+    @staticmethod
+    def _with_prefix(keys: List[str], prefix: str) -> List[str]:
+        """Keys of a sorted list that start with prefix"""
+        lo = bisect.bisect_left(keys, prefix)
+        return keys[lo:bisect.bisect_left(keys, prefix + "\U0010ffff", lo)]
+    
+    def _postings(self, tokens) -> Set[str]:
+        return set().union(*(self._token_index[t] for t in tokens))
+    
+    def _candidates(self, query: str) -> Set[str]:
+        """Entry ids that could contain query as a substring"""
+        words = query.split()
+        if not words:
+            return set(self._entries)
+        self._sync_vocab()
+        if len(words) == 1:
+            # Anywhere inside a token: a prefix of one of its suffixes
+            suffixes = self._with_prefix(self._suffix_keys, words[0])
+            return self._postings(set().union(*(self._suffix_tokens[s] for s in suffixes)))
+        # Inner words are whole tokens; the first ends a token, the last starts one
+        postings = [self._token_index.get(w, set()) for w in words[1:-1]]
+        postings.append(self._postings(self._suffix_tokens.get(words[0], ())))
+        postings.append(self._postings(self._with_prefix(self._vocab, words[-1])))
+        return set.intersection(*postings)
+    
+    def _save_entries(self, entries: List[MemoryEntry]):
+        """Append entries to today's JSONL log (one line each)"""
         date_str = datetime.now().strftime('%Y-%m-%d')
-        daily_file = self.daily_dir / f"{date_str}.md"
+        if date_str != self._daily_date:
+            self.close()
+            self._daily_fp = open(self.daily_dir / f"{date_str}.jsonl", 'a')
+            self._daily_date = date_str
+        
+        self._daily_fp.write("".join(json.dumps(asdict(e)) + "\n" for e in entries))
+        # Flush every batch: other processes (the consolidation job, other
+        # stores) read the log, and a crash must not lose written entries
+        self.flush()
+    
+    def flush(self):
+        """Push buffered daily-log lines to disk"""
+        if self._daily_fp is not None:
+            self._daily_fp.flush()
+    
+    def close(self):
+        """Flush and close the daily log"""
+        if self._daily_fp is not None:
+            self._daily_fp.close()
+            self._daily_fp = None
+            self._daily_date = None
+    
+    def consolidate_daily(self, date_str: str = None) -> Optional[Path]:
+        """Render a day's JSONL log as markdown in daily/<date>.entries.md
+        
+        The hand-edited daily/<date>.md is left alone.
+        """
+        date_str = date_str or datetime.now().strftime('%Y-%m-%d')
+        if date_str == self._daily_date:
+            self.flush()
+        log_file = self.daily_dir / f"{date_str}.jsonl"
+        if not log_file.exists():
+            return None
+        
+        loads = orjson.loads if orjson is not None else json.loads
+        parts = []
+        with open(log_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = loads(line)
+                    parts.append(
+                        f"\n## {entry['timestamp']} - {entry['category']}\n"
+                        f"**Importance:** {'⭐' * entry['importance']}\n"
+                        f"**Tags:** {', '.join(entry['tags'])}\n\n"
+                        f"{entry['content']}\n"
+                    )
+                except (ValueError, TypeError, KeyError):
+                    continue  # torn or foreign line
         
-        with open(daily_file, 'a') as f:
-            f.write(f"\n## {entry.timestamp} - {entry.category}\n")
-            f.write(f"**Importance:** {'⭐' * entry.importance}\n")
-            f.write(f"**Tags:** {', '.join(entry.tags)}\n\n")
-            f.write(f"{entry.content}\n")
+        entries_file = self.daily_dir / f"{date_str}.entries.md"
+        tmp = entries_file.with_suffix(".tmp")
+        tmp.write_text("".join(parts))
+        os.replace(tmp, entries_file)
+        return entries_file
     
     def query(self, query: str, category: str = None, 
               min_importance: int = 3, limit: int = 10) -> List[MemoryEntry]:
         """Query memories by content or category"""
+        query = query.lower()
+        if category:
+            category = sys.intern(category)
         results = []
-        for entry in self._entries.values():
-            if entry.importance < min_importance:
+        importance = self._importance
+        for entry_id in sorted(self._candidates(query), key=self._position.__getitem__):
+            if importance[self._position[entry_id]] < min_importance:
                 continue
+            entry = self._entries[entry_id]
             if category and entry.category != category:
                 continue
-            if query.lower() in entry.content.lower():
+            if query in self._lower_content[entry_id]:
                 results.append(entry)
+                if len(results) == limit:
+                    break
         return results[:limit]
     
+    def _embed_normalized(self, text: str):
+        vec = np.asarray(self.embedder.embed(text), dtype="float32")
+        return vec / (np.linalg.norm(vec) or 1.0)
+    
+    def semantic_query(self, query: str, k: int = 10,
+                       threshold: float = SEMANTIC_THRESHOLD) -> List[MemoryEntry]:
+        """Rank memories by meaning, blended with lexical overlap
+        
+        Falls back to the lexical query() when no embedder (or numpy) is set.
+        """
+        if self._vectors is None:
+            return self.query(query, min_importance=1, limit=k)
+        
+        lower = query.lower()
+        words = set(lower.split())
+        scored = []
+        for entry_id, cosine in self._vectors.search(self._query_vector(query), k):
+            if cosine < threshold:
+                continue
+            content = self._lower_content[entry_id]
+            if lower in content:
+                lexical = 1.0
+            elif words:
+                lexical = len(words.intersection(content.split())) / len(words)
+            else:
+                lexical = 0.0
+            scored.append((LEXICAL_WEIGHT * lexical + SEMANTIC_WEIGHT * cosine, entry_id))
+        scored.sort(reverse=True)
+        return [self._entries[entry_id] for _, entry_id in scored]
+    
     def get_recent(self, days: int = 7) -> List[MemoryEntry]:
         """Get recent memories"""
-        cutoff = datetime.now() - timedelta(days=days)
-        return [e for e in self._entries.values() 
-                if datetime.fromisoformat(e.timestamp) > cutoff]
+        cutoff = time.time() - days * 86400
+        return [self._entries[self._ids[i]] for i in self._positions_above(self._ts, cutoff)]
     
     def export_context(self, for_model: str = None) -> str:
         """Export memory as context string for LLM"""
@@ -116,19 +511,19 @@ class MemoryStore:
                 context_parts.append(f"- [{entry.category}] {entry.content[:200]}")
         
         # Important facts
-        important = [e for e in self._entries.values() if e.importance >= 4]
+        important = self._positions_above(self._importance, 3)[:10]
         if important:
             context_parts.append("\n## Important Facts")
-            for entry in important[:10]:
-                context_parts.append(f"- {entry.content}")
+            for i in important:
+                context_parts.append(f"- {self._entries[self._ids[i]].content}")
         
         return "\n".join(context_parts)
 
 class DualDomainMemory:
     """Wrapper for both personal and work memory"""
-    def __init__(self):
-        self.personal = MemoryStore("personal")
-        self.work = MemoryStore("work")
+    def __init__(self, embedder: Optional[Embedder] = None):
+        self.personal = MemoryStore("personal", embedder)
+        self.work = MemoryStore("work", embedder)
         
     def add_personal(self, category: str, content: str, importance: int = 3,
                      tags: List[str] = None, source: str = None):
@@ -147,6 +542,19 @@ class DualDomainMemory:
             results["work"] = self.work.query(query)
         return results
     
+    def save_embed_cache(self):
+        self.personal.save_embed_cache()
+        self.work.save_embed_cache()
+    
+    def close(self):
+        self.personal.close()
+        self.work.close()
+    
+    def consolidate_daily(self, date_str: str = None):
+        """Regenerate the markdown daily logs for both domains"""
+        self.personal.consolidate_daily(date_str)
+        self.work.consolidate_daily(date_str)
+    
     def get_context(self, domain: str = "personal") -> str:
         """Get memory context for a domain"""
         if domain == "personal":
@@ -178,4 +586,4 @@ if __name__ == "__main__":
     
     # Query
     results = memory.query_all("architecture")
-    print("Query Results:", json.dumps(results, default=lambda x: x.to_dict() if hasattr(x, 'to_dict') else str(x), indent=2))
+    print("Query Results:", json.dumps(results, default=lambda x: asdict(x) if isinstance(x, MemoryEntry) else str(x), indent=2))
@@ -5,11 +5,18 @@ Parses freeform text into actionable commands
 """
 
 import re
-from typing import Tuple, Optional, Dict, List
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Tuple, Optional, Dict
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
 
+try:
+    import ahocorasick
+except ImportError:  # optional; plain substring checks are used otherwise
+    ahocorasick = None
+
 class Intent(Enum):
     STATUS = "status"
     SWITCH_DOMAIN = "switch_domain"
@@ -20,6 +27,56 @@ class Intent(Enum):
     HELP = "help"
     UNKNOWN = "unknown"
 
+_NON_CAPTURING_RE = re.compile(r"\((?!\?)")
+_DOMAIN_RE = re.compile(r"(personal|work)")
+# Importance levels checked in order; named lookaheads keep that priority
+# inside one regex, and m.lastgroup names the level that matched first
+_IMPORTANCE_RX = re.compile(
+    r"^(?:(?P<important>(?=[\s\S]*?(?:very |super |extremely )?important))"
+    r"|(?P<critical>(?=[\s\S]*?(?:critical|urgent|asap)))"
+    r"|(?P<minor>(?=[\s\S]*?(?:not.*important|minor|small))))"
+)
+_IMPORTANCE_VALUES = {"important": 4, "critical": 5, "minor": 2}
+
+# Content triggers per intent, in priority order (earlier triggers win)
+REMEMBER_TRIGGERS = ("remember ", "note that ", "remind me that ",
+                     "i hate ", "i like ", "i love ", "i prefer ",
+                     "i need ", "i want ", "save ", "store ")
+QUERY_TRIGGERS = ("what do i remember about ", "do i remember ",
+                  "search memory for ", "query memory ", "recall ",
+                  "find in memory ", "find about memory ")
+PROPOSAL_TRIGGERS = ("propose ", "submit proposal ", "i think we should ",
+                     "we should ", "let's ", "could we ",
+                     "make a proposal ", "create a proposal ")
+
+class _TriggerScanner:
+    """Finds the highest-priority trigger present in a text in one pass"""
+    
+    def __init__(self, triggers: Tuple[str, ...]):
+        self.triggers = triggers
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for rank, trigger in enumerate(triggers):
+                self._automaton.add_word(trigger, (rank, trigger))
+            self._automaton.make_automaton()
+    
+    def after(self, text: str) -> Optional[str]:
+        """Text following the first occurrence of the best trigger, or None"""
+        if self._automaton is None:
+            for trigger in self.triggers:
+                if trigger in text:
+                    return text.split(trigger, 1)[-1]
+            return None
+        
+        best = None  # (rank, end) - occurrences arrive in text order
+        for end, (rank, _) in self._automaton.iter(text):
+            if best is None or rank < best[0]:
+                best = (rank, end)
+                if rank == 0:
+                    break
+        return None if best is None else text[best[1] + 1:]
+
 @dataclass
 class ParsedCommand:
     intent: Intent
@@ -34,7 +91,7 @@ class NLParser:
     """Natural language parser for Personal AI Architect"""
     
     def __init__(self):
-        self.intent_patterns = {
+        intent_patterns = {
             Intent.STATUS: [
                 r"^(status|how are you|system status|what's happening|what is happening)",
                 r"show me.*status",
@@ -85,8 +142,22 @@ class NLParser:
                 r"how do i use you",
             ],
         }
+        # One compiled alternation: each intent is a named lookahead tried in
+        # declaration order, so the first intent with any matching pattern wins
+        # (same priority as checking intents one by one). Inner groups are made
+        # non-capturing so m.lastgroup is always the intent name. parse()
+        # lowercases its input and every pattern is lowercase, so the regex
+        # is compiled case-sensitive and skips case folding.
+        self.master_rx = re.compile(
+            "^(?:" + "|".join(
+                f"(?P<{intent.name}>(?=[\\s\\S]*?(?:"
+                + "|".join(_NON_CAPTURING_RE.sub("(?:", p) for p in patterns)
+                + ")))"
+                for intent, patterns in intent_patterns.items()
+            ) + ")"
+        )
         
-        self.entity_extractors = {
+        entity_extractors = {
             "domain": [
                 (r"(personal|work)", 1),
             ],
@@ -103,97 +174,110 @@ class NLParser:
                 (r"low.*priority", 1),
             ],
         }
+        self.entity_extractors = {
+            name: [(re.compile(p), value) for p, value in patterns]
+            for name, patterns in entity_extractors.items()
+        }
+        self._remember_triggers = _TriggerScanner(REMEMBER_TRIGGERS)
+        self._query_triggers = _TriggerScanner(QUERY_TRIGGERS)
+        self._proposal_triggers = _TriggerScanner(PROPOSAL_TRIGGERS)
+        # master_rx group name -> (intent, extractor), resolved once
+        self._by_group = {
+            intent.name: (intent, self._EXTRACTORS.get(intent, NLParser._extract_nothing))
+            for intent in intent_patterns
+        }
     
     def parse(self, text: str) -> ParsedCommand:
         """Parse natural language into command"""
         text = text.lower().strip()
         raw = text
         
-        # Check each intent
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    entities = self._extract_entities(text, intent)
-                    return ParsedCommand(
-                        intent=intent,
-                        entities=entities,
-                        raw=raw
-                    )
+        m = self.master_rx.match(text)
+        if m:
+            intent, extract = self._by_group[m.lastgroup]
+            return ParsedCommand(
+                intent=intent,
+                entities=extract(self, text),
+                raw=raw
+            )
         
         return ParsedCommand(intent=Intent.UNKNOWN, raw=raw)
     
     def _extract_entities(self, text: str, intent: Intent) -> Dict:
         """Extract named entities from text"""
+        return self._EXTRACTORS.get(intent, NLParser._extract_nothing)(self, text)
+    
+    def _extract_nothing(self, text: str) -> Dict:
+        return {}
+    
+    def _extract_domain(self, text: str) -> Dict:
         entities = {}
-        
-        # Domain extraction
-        if intent == Intent.SWITCH_DOMAIN:
-            match = re.search(r"(personal|work)", text)
-            if match:
-                entities["domain"] = match.group(1)
-        
-        # Priority/importance extraction
-        if intent in [Intent.REMEMBER, Intent.SUBMIT_PROPOSAL]:
-            for level, (pattern, value) in enumerate([
-                (r"(very |super |extremely )?important", 4),
-                (r"critical|urgent|asap", 5),
-                (r"not.*important|minor|small", 2),
-            ]):
-                if re.search(pattern, text):
-                    entities["importance"] = value
-                    break
-        
-        # Content extraction (everything after trigger words)
-        if intent == Intent.REMEMBER:
-            triggers = ["remember ", "note that ", "remind me that ", 
-                       "i hate ", "i like ", "i love ", "i prefer ",
-                       "i need ", "i want ", "save ", "store "]
-            for trigger in triggers:
-                if trigger in text:
-                    content = text.split(trigger, 1)[-1].strip()
-                    if content:
-                        entities["content"] = content
-                    break
-        
-        elif intent == Intent.QUERY_MEMORY:
-            triggers = ["what do i remember about ", "do i remember ",
-                       "search memory for ", "query memory ", "recall ",
-                       "find in memory ", "find about memory "]
-            for trigger in triggers:
-                if trigger in text:
-                    query = text.split(trigger, 1)[-1].strip().rstrip("?")
-                    if query:
-                        entities["query"] = query
-                    break
-        
-        elif intent == Intent.SUBMIT_PROPOSAL:
-            triggers = ["propose ", "submit proposal ", "i think we should ",
-                       "we should ", "let's ", "could we ",
-                       "make a proposal ", "create a proposal "]
-            for trigger in triggers:
-                if trigger in text:
-                    proposal = text.split(trigger, 1)[-1].strip()
-                    # Try to split title and description
-                    if " because " in proposal:
-                        parts = proposal.split(" because ", 1)
-                        entities["title"] = parts[0].strip()
-                        entities["description"] = parts[1].strip()
-                    elif " for " in proposal:
-                        parts = proposal.split(" for ", 1)
-                        entities["title"] = parts[0].strip()
-                        entities["description"] = parts[1].strip()
-                    else:
-                        entities["title"] = proposal
-                        entities["description"] = proposal
-                    break
-        
-        # Default importance
-        if "importance" not in entities and intent == Intent.REMEMBER:
-            entities["importance"] = 3
-        if "priority" not in entities and intent == Intent.SUBMIT_PROPOSAL:
-            entities["priority"] = 3
-            
+        match = _DOMAIN_RE.search(text)
+        if match:
+            entities["domain"] = match.group(1)
         return entities
+    
+    def _extract_importance(self, text: str, entities: Dict):
+        match = _IMPORTANCE_RX.match(text)
+        if match:
+            entities["importance"] = _IMPORTANCE_VALUES[match.lastgroup]
+    
+    def _extract_memory(self, text: str) -> Dict:
+        entities = {}
+        self._extract_importance(text, entities)
+        # Content is everything after the trigger words
+        content = self._remember_triggers.after(text)
+        if content is not None:
+            content = content.strip()
+            if content:
+                entities["content"] = content
+        entities.setdefault("importance", 3)
+        return entities
+    
+    def _extract_query(self, text: str) -> Dict:
+        entities = {}
+        query = self._query_triggers.after(text)
+        if query is not None:
+            query = query.strip().rstrip("?")
+            if query:
+                entities["query"] = query
+        return entities
+    
+    def _extract_proposal(self, text: str) -> Dict:
+        entities = {}
+        self._extract_importance(text, entities)
+        proposal = self._proposal_triggers.after(text)
+        if proposal is not None:
+            proposal = proposal.strip()
+            # Try to split title and description
+            if " because " in proposal:
+                parts = proposal.split(" because ", 1)
+                entities["title"] = parts[0].strip()
+                entities["description"] = parts[1].strip()
+            elif " for " in proposal:
+                parts = proposal.split(" for ", 1)
+                entities["title"] = parts[0].strip()
+                entities["description"] = parts[1].strip()
+            else:
+                entities["title"] = proposal
+                entities["description"] = proposal
+        entities.setdefault("priority", 3)
+        return entities
+
+# Intent -> entity extractor, so each parse runs only its intent's steps
+NLParser._EXTRACTORS = {
+    Intent.SWITCH_DOMAIN: NLParser._extract_domain,
+    Intent.REMEMBER: NLParser._extract_memory,
+    Intent.QUERY_MEMORY: NLParser._extract_query,
+    Intent.SUBMIT_PROPOSAL: NLParser._extract_proposal,
+}
+
+# Response cache for read-only intents (not STATUS: it embeds live uptime and counts)
+CACHEABLE_INTENTS = {Intent.HELP, Intent.QUERY_MEMORY}
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 30.0  # seconds
+# Conversation turns kept in memory; older ones are dropped
+HISTORY_SIZE = 1000
 
 class ConversationManager:
     """Conversational interface for Personal AI Architect"""
@@ -201,13 +285,48 @@ class ConversationManager:
     def __init__(self, architect):
         self.architect = architect
         self.parser = NLParser()
-        self.conversation_history: List[Dict] = []
+        self.conversation_history: Deque[Dict] = deque(maxlen=HISTORY_SIZE)
+        # _response_key() -> (response, stored_at), least recently used first
+        self._response_cache: OrderedDict = OrderedDict()
+    
+    def _state_generation(self):
+        """Memory entry counts; writes through any path change them"""
+        memory = self.architect.memory
+        return (memory.personal.count, memory.work.count)
+    
+    def _response_key(self, parsed: ParsedCommand) -> tuple:
+        """Everything a cacheable response depends on"""
+        # A query with no extracted text falls back to the raw message
+        raw = parsed.raw if parsed.intent == Intent.QUERY_MEMORY and "query" not in parsed.entities else None
+        return (parsed.intent, frozenset(parsed.entities.items()), raw,
+                self.architect.active_domain, self._state_generation())
+    
+    def _cached_response(self, key: tuple) -> Optional[str]:
+        """Response of a recent, equivalent read-only command, if any"""
+        hit = self._response_cache.get(key)
+        if hit is None:
+            return None
+        if hit[1] < time.monotonic() - RESPONSE_CACHE_TTL:
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return hit[0]
+    
+    def _store_response(self, key: tuple, response: str):
+        self._response_cache[key] = (response, time.monotonic())
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
         
     def process(self, message: str) -> str:
         """Process a natural language message"""
         # Parse intent
         parsed = self.parser.parse(message)
         
+        cacheable = parsed.intent in CACHEABLE_INTENTS
+        key = self._response_key(parsed) if cacheable else None
+        response = self._cached_response(key) if cacheable else None
+        
         # Log conversation
         self.conversation_history.append({
             "input": message,
@@ -217,7 +336,13 @@ class ConversationManager:
         })
         
         # Execute command
-        response = self._execute(parsed)
+        if response is None:
+            response = self._execute(parsed)
+            if cacheable:
+                self._store_response(key, response)
+            else:
+                # Anything else may change state the cached answers depend on
+                self._response_cache.clear()
         
         # Log response
         self.conversation_history[-1]["response"] = response
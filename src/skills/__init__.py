@@ -1,10 +1,29 @@
 # Personal AI Architect - Skills Package
 
-from .morning_briefing import MorningBriefingSkill, AutoApproveRules, TaskManager, HealthMonitor
+import importlib
+
+# Exports resolve on first access, so importing one skill module doesn't
+# load the others
+_EXPORTS = {
+    "MorningBriefingSkill": ".morning_briefing",
+    "AutoApproveRules": ".morning_briefing",
+    "TaskManager": ".tasks",
+    "Task": ".tasks",
+    "HealthMonitor": ".morning_briefing",
+    "BriefingDispatcher": ".morning_briefing",
+}
 
 __all__ = [
     "MorningBriefingSkill",
     "AutoApproveRules", 
     "TaskManager",
-    "HealthMonitor"
+    "Task",
+    "HealthMonitor",
+    "BriefingDispatcher"
 ]
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
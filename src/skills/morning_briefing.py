@@ -5,20 +5,59 @@ Automated daily summary with weather, calendar, tasks, and priorities
 """
 
 from datetime import datetime, timedelta
-from dataclasses import dataclass
-from typing import List, Optional, Dict
-import json
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Dict, Sequence, Tuple
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
+import heapq
+import operator
+import os
+import time
 
-@dataclass
-class BriefingSection:
-    name: str
-    content: str
-    priority: int = 1  # 1=high, 2=medium, 3=low
+try:
+    import orjson
+except ImportError:  # optional C-accelerated JSON; stdlib json is only needed without it
+    orjson = None
+    import json
+
+# Cron runs keep fetched section content here across restarts
+BRIEFING_CACHE_FILE = Path.home() / ".cache" / "briefing.json"
+
+def ttl_cache(ttl_seconds: float, key):
+    """Memoize an async fetcher in self._cache for ttl_seconds, per key(self)"""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self):
+            cache_key = f"{method.__name__}:{key(self)}"
+            now = time.time()
+            hit = self._cache.get(cache_key)
+            if hit is not None and now - hit[0] < ttl_seconds:
+                return hit[1]
+            value = await method(self)
+            self._cache[cache_key] = (now, value)
+            self._cache_dirty = True
+            return value
+        return wrapper
+    return decorator
+
+# (name, priority, fetcher, fetcher args, keep when empty, enabling preference)
+BRIEFING_SECTIONS = (
+    ("🌤️ Weather", 1, "_get_weather", (), True, "check_weather"),
+    ("📅 Personal Calendar", 1, "_get_calendar_events", ("personal",), False, "check_personal_calendar"),
+    ("💼 Work Calendar", 1, "_get_calendar_events", ("work",), False, "check_work_calendar"),
+    ("✅ Priority Tasks", 2, "_get_priority_tasks", (), False, None),
+    ("🔥 Trending", 3, "_get_trending_topics", (), True, "trending_topics"),
+)
 
 class MorningBriefingSkill:
     """Generate automated morning briefings"""
     
-    def __init__(self):
+    _TEMPLATE = "# 🌅 Morning Briefing - {date}\n\n{body}---\n*Generated at {time}*"
+    
+    def __init__(self, cache_file: Optional[Path] = None,
+                 task_manager: Optional["TaskManager"] = None):
+        self.task_manager = task_manager
         self.preferences = {
             "location": "San Francisco",
             "check_personal_calendar": True,
@@ -29,92 +68,116 @@ class MorningBriefingSkill:
             "output_channel": "telegram"
         }
         self.last_briefing = None
+        # "fetcher:key" -> (fetched at epoch seconds, content)
+        self.cache_file = cache_file
+        self._cache: Dict[str, tuple] = self._load_cache()
+        self._cache_dirty = False
+        self._build_section_order()
+    
+    def _build_section_order(self):
+        """Enabled sections in output order; rebuilt when preferences change"""
+        self._section_order = sorted(
+            (section for section in BRIEFING_SECTIONS
+             if section[5] is None or self.preferences.get(section[5])),
+            key=lambda section: section[1]
+        )
+    
+    def _load_cache(self) -> Dict[str, tuple]:
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+        try:
+            data = self.cache_file.read_bytes()
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        except (OSError, ValueError) as e:
+            print(f"[Briefing] Ignoring unreadable cache: {e}")
+            return {}
+    
+    def _use_disk_cache(self):
+        """Persist the section cache in BRIEFING_CACHE_FILE unless a file is set"""
+        if self.cache_file is None:
+            self.cache_file = BRIEFING_CACHE_FILE
+            # Sections fetched in this process are at least as fresh as the file's
+            fetched = self._cache
+            self._cache = {**self._load_cache(), **fetched}
+            self._cache_dirty = bool(fetched)
+    
+    def _save_cache(self):
+        if self.cache_file is None or not self._cache_dirty:
+            return
+        self._cache_dirty = False
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            if orjson is not None:
+                tmp.write_bytes(orjson.dumps(self._cache))
+            else:
+                tmp.write_text(json.dumps(self._cache))
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"[Briefing] Could not save cache: {e}")
         
     def configure(self, **kwargs):
         """Configure briefing preferences"""
         self.preferences.update(kwargs)
-        return f"Morning briefing updated: {json.dumps(self.preferences, indent=2)}"
+        self._build_section_order()
+        if orjson is not None:
+            rendered = orjson.dumps(self.preferences, option=orjson.OPT_INDENT_2).decode()
+        else:
+            rendered = json.dumps(self.preferences, indent=2)
+        return f"Morning briefing updated: {rendered}"
     
     def generate(self) -> str:
         """Generate morning briefing"""
+        return asyncio.run(self.generate_async())
+    
+    async def generate_async(self) -> str:
+        """Generate morning briefing, fetching all enabled sections concurrently"""
         now = datetime.now()
         
-        sections = []
-        
-        # Weather (if enabled)
-        if self.preferences.get("check_weather"):
-            weather = self._get_weather()
-            sections.append(BriefingSection(
-                name="🌤️ Weather",
-                content=weather,
-                priority=1
-            ))
-        
-        # Calendar (if enabled)
-        if self.preferences.get("check_personal_calendar"):
-            personal = self._get_calendar_events("personal")
-            if personal:
-                sections.append(BriefingSection(
-                    name="📅 Personal Calendar",
-                    content=personal,
-                    priority=1
-                ))
-        
-        if self.preferences.get("check_work_calendar"):
-            work = self._get_calendar_events("work")
-            if work:
-                sections.append(BriefingSection(
-                    name="💼 Work Calendar",
-                    content=work,
-                    priority=1
-                ))
-        
-        # Tasks (from memory)
-        tasks = self._get_priority_tasks()
-        if tasks:
-            sections.append(BriefingSection(
-                name="✅ Priority Tasks",
-                content=tasks,
-                priority=2
-            ))
+        order = self._section_order
+        results = await asyncio.gather(
+            *(getattr(self, fetcher)(*args) for _, _, fetcher, args, _, _ in order),
+            return_exceptions=True
+        )
         
-        # Trending topics (if enabled)
-        if self.preferences.get("trending_topics"):
-            trending = self._get_trending_topics()
-            sections.append(BriefingSection(
-                name="🔥 Trending",
-                content=trending,
-                priority=3
-            ))
-        
-        # Build the briefing
-        briefing = f"# 🌅 Morning Briefing - {now.strftime('%A, %B %d, %Y')}\n\n"
-        
-        # Sort by priority
-        sections.sort(key=lambda x: x.priority)
-        
-        for section in sections:
-            briefing += f"## {section.name}\n{section.content}\n\n"
-        
-        briefing += f"---\n*Generated at {now.strftime('%I:%M %p')}*"
+        sections = []
+        for (name, _, _, _, keep_empty, _), content in zip(order, results):
+            if isinstance(content, Exception):
+                # A failing source drops its section instead of the whole briefing
+                print(f"[Briefing] {name} unavailable: {content}")
+                continue
+            if content or keep_empty:
+                sections.append(f"## {name}\n{content}\n\n")
+        briefing = self._TEMPLATE.format(
+            date=now.strftime('%A, %B %d, %Y'),
+            body="".join(sections),
+            time=now.strftime('%I:%M %p')
+        )
         
         self.last_briefing = briefing
+        # One write per run, after every fetcher has filled its slot
+        self._save_cache()
         return briefing
     
-    def _get_weather(self) -> str:
+    @ttl_cache(600, key=lambda self: self.preferences.get("location", "San Francisco"))
+    async def _get_weather(self) -> str:
         """Get weather for configured location"""
         # In real implementation, would call weather API
         location = self.preferences.get("location", "San Francisco")
         return f"Weather for {location}: ☀️ Sunny, 72°F\nFeels like 75°F"
     
-    def _get_calendar_events(self, domain: str) -> str:
+    async def _get_calendar_events(self, domain: str) -> str:
         """Get calendar events for domain"""
         # In real implementation, would call Google Calendar API
         return f"No events scheduled for {domain} calendar"
     
-    def _get_priority_tasks(self) -> str:
-        """Get priority tasks from memory"""
-        # In real implementation, would query task manager
+    async def _get_priority_tasks(self) -> str:
+        """Get priority tasks from the task manager"""
+        if self.task_manager is not None:
+            return "\n".join(
+                f"{i}. {task.title}"
+                for i, task in enumerate(self.task_manager.top_k(3), 1)
+            )
         tasks = [
             "1. Review pending proposals",
             "2. Check system health",
@@ -122,22 +185,133 @@ class MorningBriefingSkill:
         ]
         return "\n".join(tasks)
     
-    def _get_trending_topics(self) -> str:
+    # Keyed on topic order too, since the rendered list follows it
+    @ttl_cache(3600, key=lambda self: ",".join(self.preferences.get("trending_topics", ["AI"])))
+    async def _get_trending_topics(self) -> str:
         """Get trending topics"""
         topics = self.preferences.get("trending_topics", ["AI"])
         return f"Watching: {', '.join(topics)}"
     
-    def run_cron(self) -> str:
-        """Execute as cron job"""
-        briefing = self.generate()
-        # In real implementation, would send to configured channel
+    def run_cron(self, user_ids: Sequence[str] = (), adapter=None) -> str:
+        """Execute as cron job, delivering to user_ids through adapter in batches"""
+        self._use_disk_cache()
+        if adapter is None or not user_ids:
+            briefing = self.generate()
+            return f"Briefing generated ({len(briefing)} chars)"
+        
+        async def deliver():
+            dispatcher = BriefingDispatcher(adapter)
+            briefing = await self.generate_async()
+            for user_id in user_ids:
+                await dispatcher.enqueue(user_id, briefing)
+            await dispatcher.close()
+            return briefing
+        briefing = asyncio.run(deliver())
+        return f"Briefing generated ({len(briefing)} chars) for {len(user_ids)} users"
+    
+    async def run_cron_async(self, user_id: str = None,
+                             dispatcher: Optional["BriefingDispatcher"] = None) -> str:
+        """Execute as cron job for one user, queueing delivery on dispatcher"""
+        self._use_disk_cache()
+        briefing = await self.generate_async()
+        if dispatcher is not None:
+            await dispatcher.enqueue(user_id, briefing)
         return f"Briefing generated ({len(briefing)} chars)"
 
 
+class BriefingDispatcher:
+    """Micro-batches outbound briefings into one send_many call per window
+    
+    A batch goes out when batch_size briefings are queued or max_wait
+    seconds after its first one, whichever comes first. The adapter is any
+    channel adapter; its send_many((message, target) pairs) is used when
+    available, otherwise its sends are gathered.
+    """
+    
+    BATCH_SIZE = 20
+    MAX_WAIT = 0.5  # seconds
+    
+    def __init__(self, adapter, batch_size: int = BATCH_SIZE, max_wait: float = MAX_WAIT):
+        self.adapter = adapter
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Batch being gathered but not yet handed to _send
+        self._collecting: List[tuple] = []
+    
+    async def enqueue(self, user_id: str, briefing: str):
+        """Queue a briefing for user_id (the channel target)"""
+        if self._task is None or self._task.done():
+            # The queue must belong to the worker's event loop; each asyncio.run
+            # has a new one. Anything a previous loop left queued carries over.
+            queue = asyncio.Queue()
+            for item in self._collecting:
+                queue.put_nowait(item)
+            self._collecting = []
+            while self._queue is not None and not self._queue.empty():
+                queue.put_nowait(self._queue.get_nowait())
+            self._queue = queue
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put((briefing, user_id))
+    
+    async def _run(self):
+        while True:
+            batch = self._collecting = [await self._queue.get()]
+            # asyncio.timeout, unlike wait_for on 3.11, never swallows a
+            # cancellation that races with a completed get()
+            try:
+                async with asyncio.timeout(self.max_wait):
+                    while len(batch) < self.batch_size:
+                        batch.append(await self._queue.get())
+            except TimeoutError:
+                pass
+            self._collecting = []
+            try:
+                await self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _send(self, batch: List[tuple]):
+        try:
+            send_many = getattr(self.adapter, "send_many", None)
+            if send_many is not None:
+                sent = await send_many(batch)
+            else:
+                sent = await asyncio.gather(*(self.adapter.send(m, t) for m, t in batch))
+        except Exception as e:
+            print(f"[Briefing] Batch of {len(batch)} failed: {e}")
+            return
+        failed = len(batch) - sum(1 for ok in sent if ok)
+        if failed:
+            print(f"[Briefing] {failed}/{len(batch)} briefings not delivered")
+    
+    async def close(self):
+        """Deliver everything queued, then stop the background task"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+class CompiledRule(NamedTuple):
+    """An AutoApproveRules rule with its conditions parsed to (key, op, value)"""
+    name: str
+    conditions: Tuple[tuple, ...]
+    result: str
+    reason: str
+
+
 class AutoApproveRules:
     """Rules for automatic approval of low-risk actions"""
     
-    RULES = [
+    RULES = (
         {
             "name": "Internal Memory Operations",
             "conditions": ["action_type == 'memory_write'", "risk_level == 'low'"],
@@ -161,37 +335,25 @@ class AutoApproveRules:
             "conditions": ["action_type == 'status_check'", "risk_level == 'none'"],
             "result": "approve",
             "reason": "Status checks are always safe"
-        }
-    ]
+        },
+    )
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._RULES_BY_ACTION, cls._WILDCARD_RULES = _compile_rules(cls.RULES)
     
     def evaluate(self, action_type: str, risk_level: str, details: Dict) -> Dict:
         """Evaluate if action should be auto-approved"""
-        for rule in self.RULES:
-            matches = True
-            for condition in rule["conditions"]:
-                # Simple condition matching
-                if "==" in condition:
-                    key, value = condition.split("==")
-                    key = key.strip()
-                    value = value.strip().strip("'").strip('"')
-                    actual_value = details.get(key)
-                    if actual_value != value:
-                        matches = False
-                        break
-                elif "!=" in condition:
-                    key, value = condition.split("!=")
-                    key = key.strip()
-                    value = value.strip().strip("'").strip('"')
-                    actual_value = details.get(key)
-                    if actual_value == value:
-                        matches = False
-                        break
-            
-            if matches:
+        candidates = self._RULES_BY_ACTION.get(details.get("action_type"), ())
+        if self._WILDCARD_RULES:
+            # Keep declaration order across indexed and wildcard rules
+            candidates = heapq.merge(candidates, self._WILDCARD_RULES, key=lambda c: c[0])
+        for _, rule in candidates:
+            if all(op(details.get(key), value) for key, op, value in rule.conditions):
                 return {
                     "auto_approved": True,
-                    "rule": rule["name"],
-                    "reason": rule["reason"]
+                    "rule": rule.name,
+                    "reason": rule.reason
                 }
         
         # Default: require approval for actions
@@ -201,74 +363,114 @@ class AutoApproveRules:
         }
 
 
-class TaskManager:
-    """Simple task management"""
+def _compile_condition(condition: str) -> Optional[tuple]:
+    """Parse "key == 'value'" / "key != 'value'" into (key, op, value)"""
+    for token, op in (("==", operator.eq), ("!=", operator.ne)):
+        if token in condition:
+            key, value = condition.split(token)
+            return (key.strip(), op, value.strip().strip("'").strip('"'))
+    return None  # unrecognized conditions never block a match
+
+def _compile_rules(rules) -> tuple:
+    """Index rules by their action_type == condition, parsing each condition once
     
-    def __init__(self):
-        self.tasks: List[Dict] = []
-        
-    def add(self, title: str, domain: str = "personal", priority: int = 3):
-        """Add a task"""
-        task = {
-            "id": f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "title": title,
-            "domain": domain,
-            "priority": priority,
-            "status": "pending",
-            "created": datetime.now().isoformat()
-        }
-        self.tasks.append(task)
-        return f"✅ Task added: {title} ({domain}, priority {priority})"
-    
-    def list(self, domain: str = None, status: str = "pending") -> str:
-        """List tasks"""
-        filtered = [t for t in self.tasks if t["status"] == status]
-        if domain:
-            filtered = [t for t in filtered if t["domain"] == domain]
-        
-        if not filtered:
-            return "No tasks found."
-        
-        result = f"📋 Tasks ({len(filtered)}):\n"
-        for t in filtered:
-            emoji = "🔴" if t["priority"] >= 4 else "🟡" if t["priority"] >= 3 else "🟢"
-            result += f"{emoji} {t['title']} ({t['domain']})\n"
-        
-        return result
-    
-    def complete(self, task_id: str) -> str:
-        """Mark task as complete"""
-        for t in self.tasks:
-            if t["id"] == task_id or task_id in t["title"]:
-                t["status"] = "completed"
-                t["completed"] = datetime.now().isoformat()
-                return f"✅ Completed: {t['title']}"
-        return "Task not found"
+    Returns (by_action, wildcard): by_action maps an action type to a tuple
+    of (order, CompiledRule) entries whose conditions exclude the indexed
+    one; rules without an action_type equality go to wildcard. Both keep
+    declaration order.
+    """
+    by_action: Dict[str, List[tuple]] = {}
+    wildcard: List[tuple] = []
+    for order, rule in enumerate(rules):
+        conditions = [c for c in map(_compile_condition, rule["conditions"]) if c is not None]
+        for i, (key, op, value) in enumerate(conditions):
+            if key == "action_type" and op is operator.eq:
+                rest = tuple(conditions[:i] + conditions[i + 1:])
+                compiled = CompiledRule(rule["name"], rest, rule["result"], rule["reason"])
+                by_action.setdefault(value, []).append((order, compiled))
+                break
+        else:
+            compiled = CompiledRule(rule["name"], tuple(conditions), rule["result"], rule["reason"])
+            wildcard.append((order, compiled))
+    return {k: tuple(v) for k, v in by_action.items()}, tuple(wildcard)
+
+AutoApproveRules._RULES_BY_ACTION, AutoApproveRules._WILDCARD_RULES = _compile_rules(AutoApproveRules.RULES)
 
 
 class HealthMonitor:
     """System health monitoring"""
     
-    def __init__(self):
+    STATUS_CACHE_TTL = 5.0  # seconds get_status reuses the last run instead of re-checking
+    
+    def __init__(self, check_timeout: float = 5.0):
         self.checks = []
+        self.check_timeout = check_timeout  # seconds before a check counts as hung
+        # (checks ran at monotonic seconds, rendered status)
+        self._status_cache: Optional[tuple] = None
         
     def add_check(self, name: str, check_func):
         """Add a health check"""
         self.checks.append({"name": name, "func": check_func})
+        self._status_cache = None
     
     def run_all(self) -> Dict:
-        """Run all health checks"""
+        """Run all health checks concurrently in worker threads"""
+        timestamp = datetime.now().isoformat()
+        if not self.checks:
+            return self._summarize(timestamp, [])
+        
+        pool = ThreadPoolExecutor(max_workers=len(self.checks))
+        futures = [pool.submit(check["func"]) for check in self.checks]
+        done, _ = wait(futures, timeout=self.check_timeout)
+        # Don't wait on hung checks; their threads finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+        
+        outcomes = []
+        for future in futures:
+            if future not in done:
+                outcomes.append((None, TimeoutError(f"timed out after {self.check_timeout}s")))
+            elif future.exception() is not None:
+                outcomes.append((None, future.exception()))
+            else:
+                outcomes.append((future.result(), None))
+        return self._summarize(timestamp, outcomes)
+    
+    async def run_all_async(self) -> Dict:
+        """Run all health checks concurrently on the event loop
+        
+        Coroutine check functions are awaited directly; plain ones run in
+        a worker thread.
+        """
+        timestamp = datetime.now().isoformat()
+        
+        async def run(func):
+            call = func() if asyncio.iscoroutinefunction(func) else asyncio.to_thread(func)
+            try:
+                return await asyncio.wait_for(call, self.check_timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"timed out after {self.check_timeout}s")
+        
+        results = await asyncio.gather(
+            *(run(check["func"]) for check in self.checks), return_exceptions=True
+        )
+        outcomes = [
+            (None, r) if isinstance(r, Exception) else (r, None)
+            for r in results
+        ]
+        return self._summarize(timestamp, outcomes)
+    
+    def _summarize(self, timestamp: str, outcomes: List[tuple]) -> Dict:
+        """Build the report from (result, error) pairs in check order"""
         results = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "checks": [],
             "overall": "healthy"
         }
         
         healthy_count = 0
         
-        for check in self.checks:
-            try:
-                result = check["func"]()
+        for check, (result, error) in zip(self.checks, outcomes):
+            if error is None:
                 results["checks"].append({
                     "name": check["name"],
                     "status": "ok" if result else "warning",
@@ -276,11 +478,11 @@ class HealthMonitor:
                 })
                 if result:
                     healthy_count += 1
-            except Exception as e:
+            else:
                 results["checks"].append({
                     "name": check["name"],
                     "status": "error",
-                    "error": str(e)
+                    "error": str(error)
                 })
                 results["overall"] = "degraded"
         
@@ -291,11 +493,18 @@ class HealthMonitor:
     
     def get_status(self) -> str:
         """Get human-readable status"""
+        # Polled status reuses a recent run; its header still shows that run's time
+        now = time.monotonic()
+        cached = self._status_cache
+        if cached is not None and now - cached[0] < self.STATUS_CACHE_TTL:
+            return cached[1]
         results = self.run_all()
         
-        lines = [f"# 🏥 Health Status - {results['timestamp']}"]
-        lines.append(f"**Overall:** {results['overall'].upper()}")
-        lines.append(f"**Checks:** {results['healthy_count']}/{results['total_checks']} healthy\n")
+        lines = [
+            f"# 🏥 Health Status - {results['timestamp']}",
+            f"**Overall:** {results['overall'].upper()}",
+            f"**Checks:** {results['healthy_count']}/{results['total_checks']} healthy\n",
+        ]
         
         for check in results["checks"]:
             emoji = "✅" if check["status"] == "ok" else "⚠️" if check["status"] == "warning" else "❌"
@@ -305,7 +514,9 @@ class HealthMonitor:
             if check.get("error"):
                 lines.append(f"   Error: {check['error']}")
         
-        return "\n".join(lines)
+        status = "\n".join(lines)
+        self._status_cache = (now, status)
+        return status
 
 
 # Default health checks
@@ -338,8 +549,3 @@ if __name__ == "__main__":
     health = default_health_checks()
     print(health.get_status())
     
-    print("\n=== Task Manager ===")
-    tasks = TaskManager()
-    print(tasks.add("Review proposals", "personal", 3))
-    print(tasks.add("Check system health", "work", 4))
-    print(tasks.list())
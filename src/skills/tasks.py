@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Task management for Personal AI Architect
+Kept apart from the briefing skill so task users don't import its dependencies
+"""
+
+from datetime import datetime
+from dataclasses import dataclass
+from typing import List, Optional, Dict
+import heapq
+import itertools
+
+@dataclass(slots=True)
+class Task:
+    id: str
+    title: str
+    domain: str
+    priority: int
+    status: str
+    created: str
+    completed: Optional[str] = None
+
+# Listing emoji indexed by priority (clamped to 0-5): 4+ red, 3 yellow, else green
+_PRIORITY_EMOJI = ("🟢", "🟢", "🟢", "🟡", "🔴", "🔴")
+
+
+class TaskManager:
+    """Simple task management"""
+    
+    # Shared across instances so task ids never collide within a process
+    _id_counter = itertools.count()
+    
+    def __init__(self):
+        self.tasks: List[Task] = []
+        self._pending_count = 0
+        # Indexes by position in self.tasks, kept in step with add/complete
+        self._by_status: Dict[str, Dict[int, Task]] = {}
+        self._by_domain: Dict[str, set] = {}
+        # (-priority, created, position) for pending tasks; completed ones are
+        # skipped lazily when they surface
+        self._pending_heap: List[tuple] = []
+        # id -> position, and title word -> positions for substring lookups
+        self._by_id: Dict[str, int] = {}
+        self._title_index: Dict[str, set] = {}
+        
+    def add(self, title: str, domain: str = "personal", priority: int = 3):
+        """Add a task"""
+        now = datetime.now()
+        task = Task(
+            id=f"task_{now.strftime('%Y%m%d_%H%M%S')}_{next(self._id_counter):04d}",
+            title=title,
+            domain=domain,
+            priority=priority,
+            status="pending",
+            created=now.isoformat()
+        )
+        position = len(self.tasks)
+        self.tasks.append(task)
+        self._by_status.setdefault("pending", {})[position] = task
+        self._by_domain.setdefault(domain, set()).add(position)
+        self._by_id[task.id] = position
+        for word in title.split():
+            self._title_index.setdefault(word, set()).add(position)
+        heapq.heappush(self._pending_heap, (-priority, task.created, position))
+        self._pending_count += 1
+        return f"✅ Task added: {title} ({domain}, priority {priority})"
+    
+    def pending_count(self) -> int:
+        """Number of pending tasks, maintained on add/complete"""
+        return self._pending_count
+    
+    def top_k(self, k: int = 3) -> List[Task]:
+        """Highest-priority pending tasks, oldest first within a priority"""
+        heap = self._pending_heap
+        top = []
+        while heap and len(top) < k:
+            entry = heapq.heappop(heap)
+            if self.tasks[entry[2]].status == "pending":
+                top.append(entry)
+        for entry in top:
+            heapq.heappush(heap, entry)
+        return [self.tasks[position] for _, _, position in top]
+    
+    def list(self, domain: str = None, status: str = "pending") -> str:
+        """List tasks"""
+        bucket = self._by_status.get(status, {})
+        in_domain = self._by_domain.get(domain, set()) if domain else None
+        if in_domain is not None and len(in_domain) < len(bucket):
+            # Walk the smaller domain set; only its matches need ordering
+            positions = sorted(p for p in in_domain if p in bucket)
+        else:
+            # Pending tasks enter their bucket on add, so it's in creation order
+            positions = bucket if in_domain is None else [p for p in bucket if p in in_domain]
+            if status != "pending":
+                # Other buckets fill as tasks change status
+                positions = sorted(positions)
+        filtered = [bucket[p] for p in positions]
+        
+        if not filtered:
+            return "No tasks found."
+        
+        lines = [f"📋 Tasks ({len(filtered)}):"]
+        for t in filtered:
+            emoji = _PRIORITY_EMOJI[min(max(t.priority, 0), 5)]
+            lines.append(f"{emoji} {t.title} ({t.domain})")
+        lines.append("")  # keep the trailing newline
+        
+        return "\n".join(lines)
+    
+    def _find_by_title(self, text: str) -> Optional[int]:
+        """Position of the earliest task whose title contains text
+        
+        Each word of text must fall inside a single title word, so the
+        title index narrows the candidates before the substring check.
+        """
+        candidates = None
+        for word in text.split():
+            matches = set()
+            for title_word, positions in self._title_index.items():
+                if word in title_word:
+                    matches |= positions
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return None
+        positions = range(len(self.tasks)) if candidates is None else sorted(candidates)
+        for position in positions:
+            if text in self.tasks[position].title:
+                return position
+        return None
+    
+    def complete(self, task_id: str) -> str:
+        """Mark task as complete, by id or by part of its title"""
+        position = self._by_id.get(task_id)
+        if position is None:
+            position = self._find_by_title(task_id)
+            if position is None:
+                return "Task not found"
+        t = self.tasks[position]
+        if t.status == "pending":
+            self._pending_count -= 1
+        self._by_status.get(t.status, {}).pop(position, None)
+        self._by_status.setdefault("completed", {})[position] = t
+        t.status = "completed"
+        t.completed = datetime.now().isoformat()
+        return f"✅ Completed: {t.title}"
+
+
+if __name__ == "__main__":
+    tasks = TaskManager()
+    print(tasks.add("Review proposals", "personal", 3))
+    print(tasks.add("Check system health", "work", 4))
+    print(tasks.list())